@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,7 +44,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.ConcurrencyLimitMiddleware",
+    "core.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -84,6 +88,67 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "core.cache.LocMemCache",
+    },
+    # Request counters of core.throttling.CacheCounters, per process. Sized
+    # for one counter per scope, client, project and window.
+    "throttle": {
+        "BACKEND": "core.cache.LocMemCache",
+        "LOCATION": "throttle",
+        "OPTIONS": {"MAX_ENTRIES": 100_000},
+    },
+}
+
+# Where core.throttling.SlidingWindowThrottle keeps its counters:
+# "core.throttling.CacheCounters" in the THROTTLE_CACHE cache (per process
+# with the in-memory default), or "core.throttling.DatabaseCounters" in the
+# database, shared by all the worker processes.
+THROTTLE_COUNTERS = "core.throttling.CacheCounters"
+THROTTLE_CACHE = "throttle"
+
+# Response compression, see core.middleware.CompressionMiddleware
+COMPRESSION_MIN_SIZE = 512
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 4
+
+# DONE issues not updated for this many days are moved to the archive tables
+# by `python manage.py archive_issues`, see core.archive
+ISSUE_ARCHIVE_AFTER_DAYS = 90
+
+# Allowed write overhead of the issue history on updates, in percent,
+# checked by `python manage.py bench_issue_history`
+ISSUE_HISTORY_MAX_OVERHEAD = 50.0
+
+# Metrics exposed at /metrics, see core.metrics. With several worker processes,
+# set METRICS_DIR to a directory shared by the workers of the host so that
+# each of them exposes the metrics of all.
+METRICS_DIR = None
+METRICS_FLUSH_INTERVAL = 5
+
+# Comments created on the same issue within this many seconds are inserted
+# together, see core.comments.CommentBatcher. Batches only form between the
+# threads of a worker process and the first comment of a window waits for it
+# to close: only set it with threaded workers (e.g. gunicorn --threads 16).
+# 0 inserts each comment right away.
+COMMENT_BATCH_WINDOW = 0
+
+# Admission control, see core.middleware.ConcurrencyLimitMiddleware
+MAX_CONCURRENT_REQUESTS = 64
+CONCURRENCY_RETRY_AFTER = 1
+# Never shed, so probes and scrapes still reach a saturated worker
+CONCURRENCY_EXEMPT_PATHS = ("/healthz", "/readyz", "/metrics")
+
+
+# Cold start of a worker, see `python manage.py profile_startup`.
+# Measured at 0.37 to 0.57s.
+STARTUP_BUDGET_SECONDS = 0.7
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -131,6 +196,29 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
+    "DEFAULT_RENDERER_CLASSES": [
+        "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "rest_framework.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+    "DEFAULT_THROTTLE_CLASSES": ("core.throttling.SlidingWindowThrottle",),
+    "DEFAULT_THROTTLE_RATES": {
+        "default": "120/min",
+        "auth": "10/min",
+        "users": "60/min",
+        "projects": "120/min",
+        "contributors": "60/min",
+        "issues": "120/min",
+        "comments": "120/min",
+    },
 }
 
+if find_spec("msgpack") is not None:
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].append("core.renderers.MessagePackRenderer")
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"].append("core.renderers.MessagePackParser")
+
 AUTH_USER_MODEL = "core.CustomUser"
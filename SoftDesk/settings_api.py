@@ -0,0 +1,66 @@
+"""
+API-only deployment profile for autoscaled workers.
+
+Use with DJANGO_SETTINGS_MODULE=SoftDesk.settings_api. The admin, sessions,
+messages (only needed by the admin) and the API root view are not loaded,
+requests go through the JWT authentication of the API only, and the password
+validators are loaded in the background after startup instead of on the
+first signup.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK, TEMPLATES
+
+INSTALLED_APPS = [
+    app
+    for app in INSTALLED_APPS
+    if app
+    not in (
+        "django.contrib.admin",
+        "django.contrib.sessions",
+        "django.contrib.messages",
+        "django.contrib.staticfiles",
+    )
+]
+
+MIDDLEWARE = [
+    middleware
+    for middleware in MIDDLEWARE
+    if middleware
+    not in (
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "django.contrib.messages.middleware.MessageMiddleware",
+    )
+]
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.request",
+            ],
+        },
+    },
+]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": [
+        renderer
+        for renderer in REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"]
+        if renderer != "rest_framework.renderers.BrowsableAPIRenderer"
+    ],
+}
+
+API_ROOT_VIEW = False
+
+WARM_UP_PASSWORD_VALIDATORS = True
+
+# Cold start of a worker (best of 3), enforced by core.tests.StartupBudgetTests.
+# Measured at 0.36 to 0.50s; raise it with the STARTUP_BUDGET_SECONDS
+# environment variable on slower or loaded machines (e.g. shared CI runners).
+STARTUP_BUDGET_SECONDS = float(os.environ.get("STARTUP_BUDGET_SECONDS", 0.6))
@@ -1,10 +1,10 @@
-from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework.routers import DefaultRouter, SimpleRouter
 from core import views
 
-router = DefaultRouter()
+# The API root view of DefaultRouter is only useful with the browsable API
+router = DefaultRouter() if getattr(settings, "API_ROOT_VIEW", True) else SimpleRouter()
 router.register(r"projects", views.ProjectViewSet, basename="project")
 router.register(
     r"projects/(?P<project_pk>[^/.]+)/contributors",
@@ -14,6 +14,11 @@ router.register(
 router.register(
     r"projects/(?P<project_pk>[^/.]+)/issues", views.IssueViewSet, basename="issue"
 )
+router.register(
+    r"projects/(?P<project_pk>[^/.]+)/archived-issues",
+    views.ArchivedIssueViewSet,
+    basename="archived-issue",
+)
 router.register(
     r"projects/(?P<project_pk>[^/.]+)/issues/(?P<issue_pk>[^/.]+)/comments",
     views.CommentViewSet,
@@ -22,13 +27,20 @@ router.register(
 router.register(r"users", views.CustomUserViewSet, basename="user")
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
+    path("healthz", views.healthz, name="healthz"),
+    path("readyz", views.readyz, name="readyz"),
+    path("metrics", views.metrics_view, name="metrics"),
     path(
         "api/signup/",
         views.CustomUserViewSet.as_view({"post": "create"}),
         name="signup",
     ),
-    path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
-    path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("api/token/", views.ThrottledTokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path("api/token/refresh/", views.ThrottledTokenRefreshView.as_view(), name="token_refresh"),
     path("api/", include(router.urls)),
 ]
+
+if "django.contrib.admin" in settings.INSTALLED_APPS:
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path("admin/", admin.site.urls))
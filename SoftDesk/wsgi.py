@@ -8,9 +8,18 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
 """
 
 import os
+import threading
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "SoftDesk.settings")
 
 application = get_wsgi_application()
+
+if getattr(settings, "WARM_UP_PASSWORD_VALIDATORS", False):
+    # Loads the common password list in the background rather than during
+    # the first signup request.
+    from django.contrib.auth.password_validation import get_default_password_validators
+
+    threading.Thread(target=get_default_password_validators, daemon=True).start()
@@ -1,5 +1,111 @@
+from typing import Optional
+
+from django import forms
 from django.contrib import admin
-from .models import CustomUser, Project, Contributor, Issue, Comment
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connection
+from django.utils.functional import cached_property
+from .models import CustomUser, Project, Contributor, Issue, Comment, ArchivedIssue, ArchivedComment
+
+
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+def estimate_row_count(model) -> Optional[int]:
+    """
+    Returns the row count estimated by the database statistics, if any.
+    """
+    table = model._meta.db_table
+    if connection.vendor == "postgresql":
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)"
+    elif connection.vendor == "sqlite":
+        # Filled by ANALYZE
+        sql = "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1"
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    return int(str(row[0]).split()[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses the database statistics instead of COUNT(*) for unfiltered
+    changelists of large tables.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        query = getattr(self.object_list, "query", None)
+        if query is not None and not query.where:
+            estimate = estimate_row_count(self.object_list.model)
+            if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    List filter for foreign keys with an autocomplete input instead of
+    one entry per related object.
+    """
+
+    template = "admin/core/autocomplete_filter.html"
+
+    def __init__(self, field, request, params, model, model_admin, field_path) -> None:
+        self.lookup_kwarg = f"{field_path}__{field.target_field.name}__exact"
+        self.lookup_val = params.get(self.lookup_kwarg)
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.form_field = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+            required=False,
+        )
+
+    def has_output(self) -> bool:
+        return True
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        yield {
+            "id": f"autocomplete-filter-{self.field_path}",
+            "widget": self.form_field.widget.render(
+                self.lookup_kwarg,
+                self.lookup_val,
+                attrs={
+                    "id": f"autocomplete-filter-{self.field_path}",
+                    "data-filter-url": changelist.get_query_string(
+                        {self.lookup_kwarg: "__value__"}
+                    ),
+                    "data-clear-url": changelist.get_query_string(
+                        remove=[self.lookup_kwarg]
+                    ),
+                },
+            ),
+        }
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin for large tables: no full COUNT(*), estimated counts,
+    autocomplete filters and inputs for foreign keys.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @property
+    def media(self) -> forms.Media:
+        return super().media + AutocompleteSelect(None, self.admin_site).media
 
 
 @admin.register(CustomUser)
@@ -37,7 +143,7 @@ class ContributorAdmin(admin.ModelAdmin):
 
 
 @admin.register(Issue)
-class IssueAdmin(admin.ModelAdmin):
+class IssueAdmin(LargeTableAdmin):
     list_display = (
         "title",
         "description",
@@ -48,11 +154,39 @@ class IssueAdmin(admin.ModelAdmin):
         "author",
     )
     search_fields = ("title", "description")
-    list_filter = ("priority", "tag", "status", "project", "author")
+    list_filter = (
+        "priority",
+        "tag",
+        "status",
+        ("project", AutocompleteFilter),
+        ("author", AutocompleteFilter),
+    )
+    list_select_related = ("project", "author")
+    autocomplete_fields = ("project", "author", "assignee")
+    ordering = ("-id",)
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ("text", "author", "issue", "created_time")
     search_fields = ("text", "author__username", "issue__title")
-    list_filter = ("created_time", "author", "issue")
+    list_filter = (
+        "created_time",
+        ("author", AutocompleteFilter),
+        ("issue", AutocompleteFilter),
+    )
+    list_select_related = ("author", "issue")
+    autocomplete_fields = ("author", "issue")
+
+
+@admin.register(ArchivedIssue)
+class ArchivedIssueAdmin(admin.ModelAdmin):
+    list_display = ("title", "priority", "tag", "project", "author", "archived_time")
+    search_fields = ("title", "description")
+    list_filter = ("priority", "tag")
+
+
+@admin.register(ArchivedComment)
+class ArchivedCommentAdmin(admin.ModelAdmin):
+    list_display = ("text", "author", "issue", "created_time")
+    search_fields = ("text",)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
+
+        if not self.apps.is_installed("django.contrib.admin"):
+            from .startup import defer_admindocs_views
+
+            defer_admindocs_views()
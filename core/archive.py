@@ -0,0 +1,74 @@
+from datetime import timedelta
+from typing import List
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    ArchivedComment,
+    ArchivedIssue,
+    ArchivedIssueEvent,
+    Comment,
+    Issue,
+    IssueEvent,
+    Notification,
+)
+
+
+ISSUE_FIELDS = [
+    "id",
+    "title",
+    "description",
+    "priority",
+    "tag",
+    "status",
+    "project_id",
+    "author_id",
+    "assignee_id",
+    "created_time",
+    "updated_time",
+]
+COMMENT_FIELDS = ["uuid", "text", "issue_id", "author_id", "created_time"]
+EVENT_FIELDS = ["id", "issue_id", "author_id", "version", "changes", "created_time"]
+
+
+def archive_done_issues(older_than: timedelta, batch_size: int = 500) -> int:
+    """
+    Moves DONE issues not updated for `older_than`, with their comments and
+    history, to the archive tables. Each batch is moved in its own transaction.
+    Mention notifications of the archived comments are deleted: the issue is
+    done, so there is nothing left to act on.
+    Returns the number of archived issues.
+    """
+    cutoff = timezone.now() - older_than
+    archived = 0
+
+    while True:
+        with transaction.atomic():
+            ids: List[int] = list(
+                Issue.objects.select_for_update()
+                .filter(status="DONE", updated_time__lt=cutoff)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                return archived
+
+            ArchivedIssue.objects.bulk_create(
+                ArchivedIssue(**values)
+                for values in Issue.objects.filter(id__in=ids).values(*ISSUE_FIELDS)
+            )
+            ArchivedComment.objects.bulk_create(
+                ArchivedComment(**values)
+                for values in Comment.objects.filter(issue_id__in=ids).values(*COMMENT_FIELDS)
+            )
+            ArchivedIssueEvent.objects.bulk_create(
+                ArchivedIssueEvent(**values)
+                for values in IssueEvent.objects.filter(issue_id__in=ids).values(*EVENT_FIELDS)
+            )
+            IssueEvent.objects.filter(issue_id__in=ids).delete()
+            Notification.objects.filter(comment__issue_id__in=ids).delete()
+            Comment.objects.filter(issue_id__in=ids).delete()
+            Issue.objects.filter(id__in=ids).delete()
+
+        archived += len(ids)
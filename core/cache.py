@@ -0,0 +1,39 @@
+from typing import Any, Dict, Optional
+
+from django.core.cache.backends import db, filebased, locmem
+
+from . import metrics
+
+
+_MISSING = object()
+
+
+class InstrumentedCacheMixin:
+    """
+    Counts cache hits and misses of `get` in the cache_requests_total metric,
+    labelled by the cache LOCATION.
+    """
+
+    def __init__(self, location: str, params: Dict[str, Any]) -> None:
+        super().__init__(location, params)
+        self.metrics_name = location or "default"
+
+    def get(self, key: str, default: Any = None, version: Optional[int] = None) -> Any:
+        value = super().get(key, _MISSING, version)
+        hit = value is not _MISSING
+        metrics.increment(
+            "cache_requests_total", cache=self.metrics_name, result="hit" if hit else "miss"
+        )
+        return value if hit else default
+
+
+class LocMemCache(InstrumentedCacheMixin, locmem.LocMemCache):
+    pass
+
+
+class DatabaseCache(InstrumentedCacheMixin, db.DatabaseCache):
+    pass
+
+
+class FileBasedCache(InstrumentedCacheMixin, filebased.FileBasedCache):
+    pass
@@ -0,0 +1,123 @@
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Comment, Contributor, Notification
+
+
+# Same characters as the username validator of django.contrib.auth
+MENTION_RE = re.compile(r"(?<![\w.@+-])@([\w.@+-]+)")
+
+
+def find_mentions(text: str) -> Set[str]:
+    """
+    Returns the usernames mentioned as @username in the text.
+    """
+    return {name.rstrip(".") for name in MENTION_RE.findall(text) if name.rstrip(".")}
+
+
+def notify_mentions(comments: List[Comment]) -> List[Notification]:
+    """
+    Creates the notifications of the contributors mentioned in the comments,
+    with one query per project and one insert.
+    """
+    mentions_by_project: Dict[int, Dict[str, List[Comment]]] = defaultdict(lambda: defaultdict(list))
+    for comment in comments:
+        for username in find_mentions(comment.text):
+            mentions_by_project[comment.issue.project_id][username].append(comment)
+
+    notifications = []
+    for project_id, mentions in mentions_by_project.items():
+        contributors = Contributor.objects.filter(
+            project_id=project_id, user__username__in=mentions
+        ).values_list("user_id", "user__username")
+        for user_id, username in contributors:
+            notifications.extend(
+                Notification(user_id=user_id, comment=comment)
+                for comment in mentions[username]
+                if comment.author_id != user_id
+            )
+    return Notification.objects.bulk_create(notifications)
+
+
+def save_comments(comments: List[Comment]) -> List[Comment]:
+    """
+    Inserts the comments and their mention notifications in one transaction.
+    """
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments)
+        notify_mentions(comments)
+    return comments
+
+
+class PendingComment:
+    def __init__(self, comment: Comment) -> None:
+        self.comment = comment
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class CommentBatcher:
+    """
+    Coalesces the comments created on the same issue within `window` seconds
+    (COMMENT_BATCH_WINDOW by default) into one insert.
+
+    The first request of a window waits for it to close then saves the whole
+    batch; the requests joining the window wait for that save and get its
+    error if it fails. Batches only form between threads of the process, so
+    single-threaded workers only pay the wait: keep `window` at 0 for them,
+    the comments are then saved as soon as they are submitted.
+    """
+
+    def __init__(self, window: Optional[float] = None) -> None:
+        self._window = window
+        self.lock = threading.Lock()
+        self.pending: Dict[int, List[PendingComment]] = {}
+
+    @property
+    def window(self) -> float:
+        if self._window is not None:
+            return self._window
+        return getattr(settings, "COMMENT_BATCH_WINDOW", 0)
+
+    def submit(self, comment: Comment) -> Comment:
+        """
+        Saves the comment with the batch of its issue and returns it.
+        """
+        if self.window <= 0:
+            return save_comments([comment])[0]
+
+        item = PendingComment(comment)
+        with self.lock:
+            batch = self.pending.get(comment.issue_id)
+            leader = batch is None
+            if leader:
+                batch = self.pending[comment.issue_id] = []
+            batch.append(item)
+
+        if leader:
+            time.sleep(self.window)
+            with self.lock:
+                batch = self.pending.pop(comment.issue_id)
+            try:
+                save_comments([pending.comment for pending in batch])
+            except BaseException as error:
+                for pending in batch:
+                    pending.error = error
+                raise
+            finally:
+                for pending in batch:
+                    pending.done.set()
+        else:
+            item.done.wait()
+            if item.error is not None:
+                raise item.error
+        return item.comment
+
+
+comment_batcher = CommentBatcher()
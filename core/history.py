@@ -0,0 +1,59 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from .models import CustomUser, Issue, IssueEvent
+
+
+# Field name -> code stored in IssueEvent.changes
+TRACKED_FIELDS = {
+    "status": "s",
+    "priority": "p",
+    "assignee": "a",
+    "tag": "t",
+}
+FIELD_NAMES = {code: name for name, code in TRACKED_FIELDS.items()}
+
+
+def encode_changes(instance: Issue, previous: Dict[str, Any]) -> Optional[str]:
+    """
+    Returns the compact encoded diff of the tracked fields, None if none changed.
+    `previous` holds the values before the update, primary keys for foreign keys.
+    """
+    diff = {}
+    for name, code in TRACKED_FIELDS.items():
+        if name not in previous:
+            continue
+        old = previous[name]
+        new = getattr(instance, Issue._meta.get_field(name).attname)
+        if old != new:
+            diff[code] = [old, new]
+    if not diff:
+        return None
+    return json.dumps(diff, separators=(",", ":"))
+
+
+def decode_changes(changes: str) -> List[Dict[str, Any]]:
+    """
+    Returns the decoded diff as a list of {field, old, new}.
+    """
+    return [
+        {"field": FIELD_NAMES[code], "old": old, "new": new}
+        for code, (old, new) in json.loads(changes).items()
+    ]
+
+
+def record_issue_update(
+    instance: Issue, previous: Dict[str, Any], author: Optional[CustomUser]
+) -> Optional[IssueEvent]:
+    """
+    Appends an IssueEvent if a tracked field changed.
+    """
+    changes = encode_changes(instance, previous)
+    if changes is None:
+        return None
+    return IssueEvent.objects.create(
+        issue=instance,
+        author=author if author is not None and author.is_authenticated else None,
+        version=instance.version,
+        changes=changes,
+    )
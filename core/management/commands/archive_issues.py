@@ -0,0 +1,29 @@
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.archive import archive_done_issues
+
+
+class Command(BaseCommand):
+    """
+    Moves old DONE issues and their comments to the archive tables.
+
+    Usage: python manage.py archive_issues --days 90
+    """
+
+    help = "Archive DONE issues not updated for the given number of days."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--days", type=int, default=getattr(settings, "ISSUE_ARCHIVE_AFTER_DAYS", 90)
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        count = archive_done_issues(
+            timedelta(days=options["days"]), batch_size=options["batch_size"]
+        )
+        self.stdout.write(f"{count} issue(s) archived.")
@@ -0,0 +1,135 @@
+import threading
+import time
+from typing import Any, Callable, List
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.shortcuts import get_object_or_404
+
+from core.comments import CommentBatcher
+from core.models import Comment, Contributor, CustomUser, Issue, Project
+
+
+class Command(BaseCommand):
+    """
+    Compares comment creation through CommentBatcher.submit with the previous
+    one-row-per-request path, database work only: throughput with concurrent
+    submitters on one issue, and latency of a lone request. The benchmark
+    data is deleted at the end.
+
+    Usage: python manage.py bench_comments --comments 2000 --threads 16 --window 0.005 0.01
+    """
+
+    help = "Benchmark batched comment creation against one insert per request."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--comments", type=int, default=2000)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--window", type=float, nargs="+", default=[0.005, 0.01])
+        parser.add_argument("--lone-requests", type=int, default=50)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        self.author = CustomUser.objects.create(username="bench-comments")
+        mentioned = CustomUser.objects.create(username="bench-mentioned")
+        self.project = Project.objects.create(
+            title="bench", description="bench", type="BACKEND", author=self.author
+        )
+        Contributor.objects.bulk_create(
+            [
+                Contributor(user=self.author, project=self.project),
+                Contributor(user=mentioned, project=self.project),
+            ]
+        )
+        self.issue = Issue.objects.create(
+            title="bench",
+            description="bench",
+            priority="HIGH",
+            tag="BUG",
+            project=self.project,
+            author=self.author,
+        )
+        self.text = "Still failing on prod, @bench-mentioned can you have a look?"
+
+        try:
+            count, threads = options["comments"], options["threads"]
+            lone = options["lone_requests"]
+            self.stdout.write(
+                f"{'path':<26} {threads} threads (comments/s)   lone request (ms)"
+            )
+            baseline = self.throughput(self.per_request, count, threads)
+            latency = self.latency(self.per_request, lone)
+            self.stdout.write(f"{'one row per request':<26} {baseline:>21.0f}   {latency:>17.2f}")
+            for window in [0.0] + options["window"]:
+                batcher = CommentBatcher(window)
+                submit = lambda: self.batched(batcher)  # noqa: E731
+                rate = self.throughput(submit, count, threads)
+                latency = self.latency(submit, lone)
+                self.stdout.write(
+                    f"{f'CommentBatcher({window})':<26} {rate:>21.0f}   {latency:>17.2f}"
+                    f"   x{rate / baseline:.1f}"
+                )
+        finally:
+            self.project.delete()
+            CustomUser.objects.filter(id__in=[self.author.id, mentioned.id]).delete()
+
+    @staticmethod
+    def throughput(create: Callable[[], None], count: int, threads: int) -> float:
+        """
+        Returns the comments per second created by `threads` concurrent
+        submitters, each with its own database connection.
+        """
+        errors: List[BaseException] = []
+
+        def run(share: int) -> None:
+            try:
+                for _ in range(share):
+                    create()
+            except BaseException as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        workers = [
+            threading.Thread(target=run, args=(count // threads + (i < count % threads),))
+            for i in range(threads)
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        if errors:
+            raise errors[0]
+        return count / elapsed
+
+    @staticmethod
+    def latency(create: Callable[[], None], requests: int) -> float:
+        """
+        Returns the mean milliseconds of a comment created alone.
+        """
+        start = time.perf_counter()
+        for _ in range(requests):
+            create()
+        return (time.perf_counter() - start) / requests * 1000
+
+    def per_request(self) -> None:
+        """
+        Previous path: permission lookups, view lookups and one insert.
+        """
+        Project.objects.get(id=self.project.id)
+        Issue.objects.get(id=self.issue.id)
+        Contributor.objects.filter(user=self.author, project=self.project).exists()
+        get_object_or_404(Project, id=self.project.id)
+        issue = get_object_or_404(Issue, id=self.issue.id)
+        Comment.objects.create(text=self.text, issue=issue, author=self.author)
+
+    def batched(self, batcher: CommentBatcher) -> None:
+        """
+        Current path: permission lookups, then CommentBatcher.submit.
+        """
+        issue = Issue.objects.select_related("project").get(
+            id=self.issue.id, project_id=self.project.id
+        )
+        Contributor.objects.filter(user=self.author, project_id=issue.project_id).exists()
+        batcher.submit(Comment(text=self.text, issue=issue, author=self.author))
@@ -0,0 +1,121 @@
+import gzip
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core.models import CustomUser, Issue
+from core.renderers import MessagePackRenderer, msgpack
+from core.middleware import brotli
+from core.serializers import IssueSerializer
+
+
+WORDS = (
+    "the a when after login form token page button user project issue comment "
+    "crashes fails loads expires returns shows hides submits saves deletes "
+    "during before while slow empty wrong missing duplicate invalid server "
+    "client request response error timeout mobile browser settings profile "
+    "list filter sort search export import upload image file date status"
+).split()
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks bytes on the wire and encoding CPU time of IssueSerializer
+    pages for each renderer and compression.
+
+    Usage: python manage.py bench_encoding --page-size 10 --rounds 200
+    """
+
+    help = "Benchmark response size and encode time of IssueSerializer pages."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--page-size", type=int, nargs="+", default=[10, 50])
+        parser.add_argument("--rounds", type=int, default=200)
+        parser.add_argument("--description-length", type=int, default=400)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        renderers: Dict[str, Callable[[Any], bytes]] = {
+            "json": JSONRenderer().render,
+        }
+        if msgpack is not None:
+            renderers["msgpack"] = MessagePackRenderer().render
+        else:
+            self.stdout.write("msgpack is not installed, skipping MessagePack.")
+
+        # Same levels as core.middleware.CompressionMiddleware
+        gzip_level = getattr(settings, "COMPRESSION_GZIP_LEVEL", 6)
+        brotli_quality = getattr(settings, "COMPRESSION_BROTLI_QUALITY", 4)
+        compressors: Dict[str, Callable[[bytes], bytes]] = {
+            "identity": lambda body: body,
+            "gzip": lambda body: gzip.compress(body, compresslevel=gzip_level, mtime=0),
+        }
+        if brotli is not None:
+            compressors["br"] = lambda body: brotli.compress(body, quality=brotli_quality)
+        else:
+            self.stdout.write("brotli is not installed, skipping brotli.")
+
+        self.stdout.write(
+            f"{'page':>5} {'renderer':<8} {'encoding':<9} {'bytes':>8} {'us/page':>9}"
+        )
+        for page_size in options["page_size"]:
+            data = self.build_page(page_size, options["description_length"])
+            for renderer_name, render in renderers.items():
+                for encoding, compress in compressors.items():
+                    body = compress(render(data))
+                    start = time.perf_counter()
+                    for _ in range(options["rounds"]):
+                        compress(render(data))
+                    elapsed = (time.perf_counter() - start) / options["rounds"]
+                    self.stdout.write(
+                        f"{page_size:>5} {renderer_name:<8} {encoding:<9} "
+                        f"{len(body):>8} {elapsed * 1e6:>9.1f}"
+                    )
+
+    @staticmethod
+    def build_page(page_size: int, description_length: int) -> Dict[str, Any]:
+        """
+        Returns a paginated IssueSerializer payload built from unsaved issues.
+        """
+        author = CustomUser(id=1, username="morgan")
+        # Each issue gets its own text, so compression cannot just reference
+        # the previous descriptions; seeded for comparable runs.
+        rng = random.Random(page_size)
+        issues: List[Issue] = [
+            Issue(
+                id=i,
+                title=f"Issue number {i}",
+                description=Command.build_description(rng, description_length),
+                priority="HIGH",
+                tag="BUG",
+                status="IN PROGRESS",
+                project_id=1,
+                author=author,
+                assignee_id=2,
+                created_time=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            )
+            for i in range(page_size)
+        ]
+        return {
+            "count": page_size,
+            "next": None,
+            "previous": None,
+            "results": IssueSerializer(issues, many=True).data,
+        }
+
+    @staticmethod
+    def build_description(rng: random.Random, length: int) -> str:
+        """
+        Returns a random sequence of English words of about `length` characters.
+        """
+        words: List[str] = []
+        size = 0
+        while size < length:
+            word = rng.choice(WORDS)
+            words.append(word)
+            size += len(word) + 1
+        return " ".join(words)[:length]
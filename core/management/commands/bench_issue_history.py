@@ -0,0 +1,81 @@
+import time
+from typing import Any, Type
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.concurrency import VersionedModelSerializer
+from core.models import CustomUser, Issue, Project
+from core.serializers import IssueSerializer
+
+
+class UnrecordedIssueSerializer(IssueSerializer):
+    """
+    IssueSerializer without history, the baseline of the benchmark.
+    """
+
+    def record_update(self, instance: Issue, previous: Any) -> None:
+        pass
+
+
+class Command(BaseCommand):
+    """
+    Measures the write overhead of the issue history on updates and fails
+    above the allowed percentage. Runs in a transaction rolled back at the end.
+
+    Usage: python manage.py bench_issue_history --updates 2000
+    """
+
+    help = "Benchmark the write overhead of the issue history."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--updates", type=int, default=2000)
+        parser.add_argument(
+            "--max-overhead",
+            type=float,
+            default=getattr(settings, "ISSUE_HISTORY_MAX_OVERHEAD", 50.0),
+            help="Allowed overhead in percent.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        with transaction.atomic():
+            author = CustomUser.objects.create(username="bench-issue-history")
+            project = Project.objects.create(
+                title="bench", description="bench", type="BACKEND", author=author
+            )
+            issue = Issue.objects.create(
+                title="bench",
+                description="bench",
+                priority="LOW",
+                tag="BUG",
+                project=project,
+                author=author,
+            )
+            baseline = self.run(UnrecordedIssueSerializer, issue, options["updates"])
+            recorded = self.run(IssueSerializer, issue, options["updates"])
+            transaction.set_rollback(True)
+
+        overhead = (recorded - baseline) / baseline * 100
+        self.stdout.write(
+            f"without history: {baseline / options['updates'] * 1e6:.1f} us/update\n"
+            f"with history:    {recorded / options['updates'] * 1e6:.1f} us/update\n"
+            f"overhead:        {overhead:.1f}% (max {options['max_overhead']:.1f}%)"
+        )
+        if overhead > options["max_overhead"]:
+            raise CommandError("Issue history write overhead above the limit.")
+
+    @staticmethod
+    def run(serializer_class: Type[VersionedModelSerializer], issue: Issue, updates: int) -> float:
+        """
+        Returns the seconds taken by `updates` status changes of the issue.
+        """
+        statuses = ["TODO", "IN PROGRESS", "DONE"]
+        start = time.perf_counter()
+        for i in range(updates):
+            serializer = serializer_class(
+                issue, data={"status": statuses[i % 3]}, partial=True
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return time.perf_counter() - start
@@ -0,0 +1,39 @@
+from importlib import import_module
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from core.startup import measure_startup
+
+
+class Command(BaseCommand):
+    """
+    Reports the cold start time of a worker and its most expensive imports.
+
+    Usage: python manage.py profile_startup --profile SoftDesk.settings_api --top 20
+    """
+
+    help = "Profile worker cold start and import time per module."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--profile", default="SoftDesk.settings")
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument(
+            "--sort", choices=["cumulative", "self"], default="cumulative"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        profile = measure_startup(options["profile"])
+        column = 2 if options["sort"] == "cumulative" else 1
+        imports = sorted(profile.imports, key=lambda item: item[column], reverse=True)
+
+        self.stdout.write(f"{'self ms':>9} {'cumul. ms':>10}  module")
+        for name, self_us, cumulative_us in imports[: options["top"]]:
+            self.stdout.write(f"{self_us / 1000:>9.1f} {cumulative_us / 1000:>10.1f}  {name}")
+
+        budget = getattr(import_module(options["profile"]), "STARTUP_BUDGET_SECONDS", None)
+        self.stdout.write(
+            f"\n{options['profile']}: {profile.seconds * 1000:.0f} ms, "
+            f"{len(profile.modules)} modules loaded"
+            + (f" (budget {budget * 1000:.0f} ms)" if budget else "")
+        )
@@ -0,0 +1,38 @@
+from typing import Any
+
+from django.db import transaction
+from django.db.models import Count
+from django.core.management.base import BaseCommand
+
+from core.models import Issue, UserIssueSummary
+from core.signals import STATUS_COLUMNS
+
+
+class Command(BaseCommand):
+    """
+    Recomputes every UserIssueSummary from the Issue table, e.g. after
+    bulk imports or raw SQL updates that bypass the signals.
+
+    Usage: python manage.py rebuild_issue_summaries
+    """
+
+    help = "Recompute the per-user summaries of assigned issues."
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        summaries = {}
+        rows = (
+            Issue.objects.filter(assignee__isnull=False)
+            .values("assignee_id", "status")
+            .annotate(count=Count("id"))
+        )
+        for row in rows:
+            summary = summaries.setdefault(
+                row["assignee_id"], UserIssueSummary(user_id=row["assignee_id"])
+            )
+            if row["status"] in STATUS_COLUMNS:
+                setattr(summary, STATUS_COLUMNS[row["status"]], row["count"])
+
+        with transaction.atomic():
+            UserIssueSummary.objects.all().delete()
+            UserIssueSummary.objects.bulk_create(summaries.values())
+        self.stdout.write(f"{len(summaries)} summary(ies) rebuilt.")
@@ -0,0 +1,248 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+
+# Upper bounds of the histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HISTOGRAM_BUCKETS = {
+    "db_query_duration_seconds": (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+}
+
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+# Each thread records in its own shard, so recording never takes a lock;
+# shards are only merged when the metrics are collected. The shard of an
+# exited thread is folded into _retired, so thread-per-request servers do not
+# accumulate shards.
+_local = threading.local()
+_shards: List[Dict[str, Dict[Key, Any]]] = []
+_retired: Dict[str, Dict[Key, Any]] = {"counter": {}, "gauge": {}, "histogram": {}}
+_shards_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_last_flush = 0.0
+
+logger = logging.getLogger(__name__)
+
+
+class _ShardOwner:
+    """
+    Held only by the thread local storage, so it is collected when the
+    thread exits.
+    """
+
+
+def _shard() -> Dict[str, Dict[Key, Any]]:
+    try:
+        return _local.shard
+    except AttributeError:
+        shard: Dict[str, Dict[Key, Any]] = {"counter": {}, "gauge": {}, "histogram": {}}
+        with _shards_lock:
+            _shards.append(shard)
+        _local.owner = _ShardOwner()
+        weakref.finalize(_local.owner, _retire, shard)
+        _local.shard = shard
+        return shard
+
+
+def _retire(shard: Dict[str, Dict[Key, Any]]) -> None:
+    with _shards_lock:
+        _merge(_retired, shard)
+        _shards.remove(shard)
+
+
+def _merge(merged: Dict[str, Dict[Key, Any]], shard: Dict[str, Dict[Key, Any]]) -> None:
+    for kind in ("counter", "gauge"):
+        for key, value in list(shard[kind].items()):
+            merged[kind][key] = merged[kind].get(key, 0) + value
+    for key, (counts, total) in list(shard["histogram"].items()):
+        _merge_histogram(merged["histogram"], key, list(counts), total)
+
+
+def _key(name: str, labels: Dict[str, Any]) -> Key:
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def increment(name: str, amount: float = 1, **labels: Any) -> None:
+    """
+    Increments a counter.
+    """
+    counters = _shard()["counter"]
+    key = _key(name, labels)
+    counters[key] = counters.get(key, 0) + amount
+
+
+def add_gauge(name: str, amount: float, **labels: Any) -> None:
+    """
+    Adds amount (possibly negative) to a gauge.
+    """
+    gauges = _shard()["gauge"]
+    key = _key(name, labels)
+    gauges[key] = gauges.get(key, 0) + amount
+
+
+def observe(name: str, value: float, **labels: Any) -> None:
+    """
+    Records a value in a histogram.
+    """
+    histograms = _shard()["histogram"]
+    key = _key(name, labels)
+    buckets = HISTOGRAM_BUCKETS.get(name, DEFAULT_BUCKETS)
+    histogram = histograms.get(key)
+    if histogram is None:
+        # [count per bucket + one for +Inf, sum]
+        histogram = histograms[key] = [[0] * (len(buckets) + 1), 0.0]
+    histogram[0][bisect_left(buckets, value)] += 1
+    histogram[1] += value
+
+
+def snapshot() -> Dict[str, Dict[Key, Any]]:
+    """
+    Returns the metrics of this process, merged over its threads.
+    """
+    merged: Dict[str, Dict[Key, Any]] = {"counter": {}, "gauge": {}, "histogram": {}}
+    with _shards_lock:
+        # Under the lock, so a shard retired meanwhile is not counted twice
+        _merge(merged, _retired)
+        shards = list(_shards)
+    for shard in shards:
+        _merge(merged, shard)
+    return merged
+
+
+def _merge_histogram(histograms: Dict[Key, Any], key: Key, counts: List[int], total: float) -> None:
+    if key not in histograms:
+        histograms[key] = [counts, total]
+        return
+    merged_counts, merged_total = histograms[key]
+    histograms[key] = [[a + b for a, b in zip(merged_counts, counts)], merged_total + total]
+
+
+def _metrics_dir() -> Optional[Path]:
+    directory = getattr(settings, "METRICS_DIR", None)
+    return Path(directory) if directory else None
+
+
+def flush(force: bool = False) -> None:
+    """
+    Writes the metrics of this process to METRICS_DIR, at most every
+    METRICS_FLUSH_INTERVAL seconds, so any worker can expose all of them.
+    Unless forced, returns right away while another thread is flushing.
+    """
+    global _last_flush
+    directory = _metrics_dir()
+    if directory is None:
+        return
+    if not _flush_lock.acquire(blocking=force):
+        return
+    try:
+        now = time.monotonic()
+        if not force and now - _last_flush < getattr(settings, "METRICS_FLUSH_INTERVAL", 5):
+            return
+        _last_flush = now
+
+        data = [
+            [kind, name, list(labels), value]
+            for kind, metrics in snapshot().items()
+            for (name, labels), value in metrics.items()
+        ]
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.getpid()}-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as tmp_file:
+                json.dump(data, tmp_file)
+            os.replace(tmp_path, directory / f"{os.getpid()}.json")
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    finally:
+        _flush_lock.release()
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect() -> Dict[str, Dict[Key, Any]]:
+    """
+    Returns the metrics of all worker processes when METRICS_DIR is set,
+    of this process otherwise. Gauges of exited processes are dropped.
+    """
+    directory = _metrics_dir()
+    if directory is None:
+        return snapshot()
+
+    try:
+        flush(force=True)
+    except OSError:
+        logger.exception("Could not write the metrics to %s", directory)
+
+    merged: Dict[str, Dict[Key, Any]] = {"counter": {}, "gauge": {}, "histogram": {}}
+    for path in directory.glob("*.json"):
+        if not path.stem.isdigit():
+            continue
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        alive = _is_alive(int(path.stem))
+        for kind, name, labels, value in data:
+            key = (name, tuple(tuple(label) for label in labels))
+            if kind == "histogram":
+                _merge_histogram(merged[kind], key, value[0], value[1])
+            elif kind == "counter" or alive:
+                merged[kind][key] = merged[kind].get(key, 0) + value
+    return merged
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (
+        '{}="{}"'.format(label, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for label, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus(metrics: Dict[str, Dict[Key, Any]]) -> str:
+    """
+    Returns the metrics in the Prometheus text exposition format.
+    """
+    lines: List[str] = []
+    for kind in ("counter", "gauge", "histogram"):
+        typed = set()
+        for (name, labels), value in sorted(metrics[kind].items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} {kind}")
+                typed.add(name)
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+                continue
+            counts, total = value
+            buckets = HISTOGRAM_BUCKETS.get(name, DEFAULT_BUCKETS)
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += count
+                lines.append(
+                    f"{name}_bucket{_format_labels(labels, (('le', str(bound)),))} {cumulative}"
+                )
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
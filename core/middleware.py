@@ -0,0 +1,182 @@
+import gzip
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
+
+from . import metrics
+
+try:
+    import brotli
+except ImportError:  # optional dependency, gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper counting and timing the queries of a request.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, execute: Callable, sql: str, params: Any, many: bool, context: Dict) -> Any:
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            metrics.observe("db_query_duration_seconds", time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """
+    Records request counts, latency and database queries per view and
+    viewset action, and the requests in flight, cf core.metrics.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        request.metrics_labels = {"view": "unresolved", "action": request.method.lower()}
+        recorder = QueryRecorder()
+        metrics.add_gauge("http_requests_in_flight", 1)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(recorder):
+                response = self.get_response(request)
+        finally:
+            metrics.add_gauge("http_requests_in_flight", -1)
+
+        labels = request.metrics_labels
+        metrics.observe("http_request_duration_seconds", time.perf_counter() - start, **labels)
+        metrics.increment(
+            "http_requests_total", method=request.method, status=response.status_code, **labels
+        )
+        metrics.increment("db_queries_total", recorder.count, **labels)
+        try:
+            metrics.flush()
+        except Exception:
+            # Losing a metrics export must not fail the request
+            logger.exception("Could not export the metrics")
+        return response
+
+    def process_view(self, request: HttpRequest, view_func: Callable, view_args, view_kwargs) -> None:
+        viewset = getattr(view_func, "cls", None)
+        method = request.method.lower()
+        if viewset is None:
+            request.metrics_labels = {"view": view_func.__name__, "action": method}
+        else:
+            actions = getattr(view_func, "actions", None) or {}
+            request.metrics_labels = {
+                "view": viewset.__name__,
+                "action": actions.get(method, method),
+            }
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Sheds load with a 503 once MAX_CONCURRENT_REQUESTS requests are in flight
+    in this process, before the database becomes the bottleneck. Paths in
+    CONCURRENCY_EXEMPT_PATHS (the health checks and metrics) are never shed,
+    so a busy but healthy worker is not restarted by its orchestrator.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+        self.limit = getattr(settings, "MAX_CONCURRENT_REQUESTS", 64)
+        self.retry_after = getattr(settings, "CONCURRENCY_RETRY_AFTER", 1)
+        self.exempt_paths = frozenset(
+            getattr(settings, "CONCURRENCY_EXEMPT_PATHS", ("/healthz", "/readyz", "/metrics"))
+        )
+        self.slots = threading.BoundedSemaphore(self.limit)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if request.path in self.exempt_paths:
+            return self.get_response(request)
+        if not self.slots.acquire(blocking=False):
+            metrics.increment("shed_requests_total", reason="concurrency")
+            response = JsonResponse(
+                {"detail": "Server is busy, please retry later."}, status=503
+            )
+            response["Retry-After"] = str(self.retry_after)
+            return response
+        try:
+            return self.get_response(request)
+        finally:
+            self.slots.release()
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses of at least COMPRESSION_MIN_SIZE bytes with brotli
+    (when installed) or gzip, according to the client's Accept-Encoding.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+        self.min_size = getattr(settings, "COMPRESSION_MIN_SIZE", 512)
+        self.gzip_level = getattr(settings, "COMPRESSION_GZIP_LEVEL", 6)
+        self.brotli_quality = getattr(settings, "COMPRESSION_BROTLI_QUALITY", 4)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        response = self.get_response(request)
+
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        if len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        encoding = self.select_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if encoding == "br":
+            compressed = brotli.compress(response.content, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(response.content, compresslevel=self.gzip_level, mtime=0)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
+
+    @staticmethod
+    def select_encoding(accept_encoding: str) -> Optional[str]:
+        """
+        Returns the supported encoding with the highest q-value (brotli on a
+        tie), none of those with q=0. `*` applies to the codings not listed.
+        """
+        qvalues: Dict[str, float] = {}
+        for item in accept_encoding.split(","):
+            coding, _, params = item.strip().partition(";")
+            match = re.search(r"q=([0-9.]+)", params)
+            try:
+                qvalues[coding.strip().lower()] = float(match.group(1)) if match else 1.0
+            except ValueError:
+                continue
+
+        supported = ("br", "gzip") if brotli is not None else ("gzip",)
+        wildcard = qvalues.get("*", 0.0)
+        best, best_q = None, 0.0
+        for coding in supported:
+            q = qvalues.get(coding, wildcard)
+            if q > best_q:
+                best, best_q = coding, q
+        return best
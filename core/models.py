@@ -1,7 +1,8 @@
 from django.db import models
+from django.db.models import F
 from django.contrib.auth.models import AbstractUser
 import uuid
-from typing import Optional
+from typing import Any, Optional
 
 
 TYPES = [
@@ -98,7 +99,30 @@ class Contributor(models.Model):
         return f"{self.user} - {self.project}"
 
 
-class Issue(models.Model):
+class VersionedSaveMixin:
+    """
+    Bumps `version` in the database when a saved row is updated through
+    save() (admin, scripts), so API clients holding the previous version get
+    a conflict instead of overwriting the change, cf core.concurrency.
+    """
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
+        version = self.version
+        self.version = F("version") + 1
+        try:
+            super().save(*args, **kwargs)
+        except BaseException:
+            self.version = version
+            raise
+        self.refresh_from_db(fields=["version"])
+
+
+class Issue(VersionedSaveMixin, models.Model):
     """
     Model for Issue.
 
@@ -112,6 +136,8 @@ class Issue(models.Model):
         author (CustomUser)
         assignee (CustomUser)
         created_time (datetime)
+        updated_time (datetime)
+        version (int): bumped on every update, cf core.concurrency
     """
     title: str = models.CharField(max_length=50)
     description: str = models.TextField()
@@ -140,12 +166,32 @@ class Issue(models.Model):
         on_delete=models.SET_NULL,
     )
     created_time = models.DateTimeField(auto_now_add=True)
+    updated_time = models.DateTimeField(auto_now=True)
+    version: int = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "updated_time"]),
+            models.Index(fields=["assignee", "-updated_time"]),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values) -> "Issue":
+        """
+        Keeps the loaded assignee and status, cf core.signals.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_assignment = (
+            instance.__dict__.get("assignee_id"),
+            instance.__dict__.get("status"),
+        )
+        return instance
 
     def __str__(self) -> str:
         return self.title
 
 
-class Comment(models.Model):
+class Comment(VersionedSaveMixin, models.Model):
     """
     Model for Comment.
 
@@ -155,6 +201,7 @@ class Comment(models.Model):
         author (CustomUser)
         created_time (datetime)
         uuid (models.UUIDField)
+        version (int): bumped on every update, cf core.concurrency
     """
 
     text: str = models.TextField()
@@ -168,6 +215,220 @@ class Comment(models.Model):
     uuid = models.UUIDField(
         primary_key=True, default=uuid.uuid4, editable=False, unique=True
     )
+    version: int = models.PositiveIntegerField(default=1)
+
+    def __str__(self) -> str:
+        return self.text[:50]
+
+
+class Notification(models.Model):
+    """
+    Model for the notification of a user mentioned in a Comment, cf core.comments.
+
+    Attributes:
+        user (CustomUser)
+        comment (Comment)
+        is_read (bool)
+        created_time (datetime)
+    """
+
+    user: CustomUser = models.ForeignKey(
+        CustomUser, related_name="notifications", on_delete=models.CASCADE
+    )
+    comment: Comment = models.ForeignKey(
+        Comment, related_name="notifications", on_delete=models.CASCADE
+    )
+    is_read: bool = models.BooleanField(default=False)
+    created_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "-created_time"])]
+
+    def __str__(self) -> str:
+        return f"{self.user} - {self.comment}"
+
+
+class ThrottleCounter(models.Model):
+    """
+    Model for the request counters of core.throttling.DatabaseCounters.
+
+    Attributes:
+        key (str): scope, client, project and window
+        count (int)
+        expires (float): Unix time after which the row can be deleted
+    """
+
+    key: str = models.CharField(max_length=255, primary_key=True)
+    count: int = models.PositiveIntegerField(default=0)
+    expires: float = models.FloatField(db_index=True)
+
+    def __str__(self) -> str:
+        return f"{self.key}: {self.count}"
+
+
+class IssueEvent(models.Model):
+    """
+    Append-only log of the changes of an Issue, cf IssueSerializer.
+
+    Attributes:
+        issue (Issue)
+        author (CustomUser)
+        version (int): version of the Issue after the change
+        changes (str): compact JSON, {field code: [old, new]}
+        created_time (datetime)
+    """
+
+    issue: Issue = models.ForeignKey(
+        Issue, related_name="events", on_delete=models.CASCADE
+    )
+    author: Optional[CustomUser] = models.ForeignKey(
+        CustomUser,
+        related_name="issue_events",
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+    version: int = models.PositiveIntegerField()
+    changes: str = models.TextField()
+    created_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["issue", "-id"])]
+
+    def __str__(self) -> str:
+        return f"{self.issue_id} v{self.version}"
+
+
+class UserIssueSummary(models.Model):
+    """
+    Per-user count of assigned Issues by status, kept up to date by
+    core.signals.
+
+    Attributes:
+        user (CustomUser)
+        todo (int)
+        in_progress (int)
+        done (int)
+    """
+
+    user: CustomUser = models.OneToOneField(
+        CustomUser,
+        related_name="issue_summary",
+        primary_key=True,
+        on_delete=models.CASCADE,
+    )
+    todo: int = models.IntegerField(default=0)
+    in_progress: int = models.IntegerField(default=0)
+    done: int = models.IntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.user} - {self.todo}/{self.in_progress}/{self.done}"
+
+
+class ArchivedIssue(models.Model):
+    """
+    Model for a DONE Issue moved out of the Issue table, cf core.archive.
+    Keeps the id of the original Issue.
+
+    Attributes:
+        id (int)
+        title (str)
+        description (str)
+        priority (str)
+        tag (str)
+        status (str)
+        project (Project)
+        author (CustomUser)
+        assignee (CustomUser)
+        created_time (datetime)
+        updated_time (datetime)
+        archived_time (datetime)
+    """
+
+    id: int = models.BigIntegerField(primary_key=True)
+    title: str = models.CharField(max_length=50)
+    description: str = models.TextField()
+    priority: str = models.CharField(max_length=10, choices=PRIORITIES)
+    tag: str = models.CharField(max_length=10, choices=TAGS)
+    status: str = models.CharField(max_length=15, choices=STATUSES)
+    project: Project = models.ForeignKey(
+        Project, related_name="archived_issues", on_delete=models.CASCADE
+    )
+    author: CustomUser = models.ForeignKey(
+        CustomUser,
+        related_name="archived_created_issues",
+        on_delete=models.CASCADE,
+    )
+    assignee: Optional[CustomUser] = models.ForeignKey(
+        CustomUser,
+        related_name="archived_assigned_issues",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+    )
+    created_time = models.DateTimeField()
+    updated_time = models.DateTimeField()
+    archived_time = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return self.title
+
+
+class ArchivedComment(models.Model):
+    """
+    Model for a Comment archived with its ArchivedIssue.
+
+    Attributes:
+        uuid (models.UUIDField)
+        text (str)
+        issue (ArchivedIssue)
+        author (CustomUser)
+        created_time (datetime)
+    """
+
+    uuid = models.UUIDField(primary_key=True, editable=False)
+    text: str = models.TextField()
+    issue: ArchivedIssue = models.ForeignKey(
+        ArchivedIssue, related_name="comments", on_delete=models.CASCADE
+    )
+    author: CustomUser = models.ForeignKey(
+        CustomUser, related_name="archived_comments", on_delete=models.CASCADE
+    )
+    created_time = models.DateTimeField()
 
     def __str__(self) -> str:
         return self.text[:50]
+
+
+class ArchivedIssueEvent(models.Model):
+    """
+    Model for an IssueEvent archived with its ArchivedIssue.
+    Keeps the id of the original IssueEvent.
+
+    Attributes:
+        id (int)
+        issue (ArchivedIssue)
+        author (CustomUser)
+        version (int)
+        changes (str)
+        created_time (datetime)
+    """
+
+    id: int = models.BigIntegerField(primary_key=True)
+    issue: ArchivedIssue = models.ForeignKey(
+        ArchivedIssue, related_name="events", on_delete=models.CASCADE
+    )
+    author: Optional[CustomUser] = models.ForeignKey(
+        CustomUser,
+        related_name="archived_issue_events",
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+    version: int = models.PositiveIntegerField()
+    changes: str = models.TextField()
+    created_time = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["issue", "-id"])]
+
+    def __str__(self) -> str:
+        return f"{self.issue_id} v{self.version}"
@@ -1,6 +1,7 @@
 from rest_framework.permissions import BasePermission
 from .models import Project, Contributor, Issue, Comment
 from django.http import HttpRequest
+from django.shortcuts import get_object_or_404
 from rest_framework.viewsets import ViewSet
 from rest_framework.request import Request
 
@@ -85,13 +86,23 @@ class CommentPermission(BasePermission):
     """
 
     def has_permission(self, request: HttpRequest, view: ViewSet) -> bool:
-        project = Project.objects.get(id=view.kwargs["project_pk"])
-        issue = Issue.objects.get(id=view.kwargs["issue_pk"])
+        issue = view.get_issue()
 
         if view.action in ["update", "partial_update", "destroy"]:
-            comment = Comment.objects.get(uuid=view.kwargs["pk"], issue=issue)
+            comment = get_object_or_404(Comment, uuid=view.kwargs["pk"], issue=issue)
             return request.user == comment.author
 
         return Contributor.objects.filter(
-            user=request.user, project=project
+            user=request.user, project_id=issue.project_id
+        ).exists()
+
+
+class ArchivedIssuePermission(BasePermission):
+    """
+    Contributors can [List, Retrieve],
+    """
+
+    def has_permission(self, request: HttpRequest, view: ViewSet) -> bool:
+        return Contributor.objects.filter(
+            user=request.user, project_id=view.kwargs["project_pk"]
         ).exists()
@@ -0,0 +1,61 @@
+from typing import Any, Mapping, Optional
+
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+
+try:
+    import msgpack
+except ImportError:  # optional dependency, see pyproject extras
+    msgpack = None
+
+
+def _default(obj: Any) -> Any:
+    """
+    Encodes the types msgpack does not know (datetime, UUID, Decimal...)
+    the same way the JSON renderer does.
+    """
+    return JSONEncoder().default(obj)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders the API data as MessagePack, selected with
+    `Accept: application/msgpack`.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None,
+    ) -> bytes:
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parses MessagePack request bodies sent with
+    `Content-Type: application/msgpack`.
+    """
+
+    media_type = "application/msgpack"
+
+    def parse(
+        self,
+        stream: Any,
+        media_type: Optional[str] = None,
+        parser_context: Optional[Mapping[str, Any]] = None,
+    ) -> Any:
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
@@ -1,8 +1,23 @@
 from rest_framework import serializers
-from .models import CustomUser, Contributor, Project, Issue, Comment
+from .models import (
+    CustomUser,
+    Contributor,
+    Project,
+    Issue,
+    Comment,
+    Notification,
+    IssueEvent,
+    UserIssueSummary,
+    ArchivedIssue,
+    ArchivedComment,
+    ArchivedIssueEvent,
+)
 from django.contrib.auth.password_validation import validate_password
-from typing import Any, Dict
+from typing import Any, Dict, List
 from django.contrib.auth.hashers import make_password
+from .comments import comment_batcher
+from .concurrency import VersionedModelSerializer
+from .history import decode_changes, record_issue_update
 
 
 class CustomUserSerializer(serializers.ModelSerializer):
@@ -111,7 +126,7 @@ class ContributorSerializer(serializers.ModelSerializer):
         return contributor
 
 
-class IssueSerializer(serializers.ModelSerializer):
+class IssueSerializer(VersionedModelSerializer):
     """
     Serializer for Issue model.
     """
@@ -132,6 +147,7 @@ class IssueSerializer(serializers.ModelSerializer):
             "author",
             "assignee",
             "created_time",
+            "version",
         ]
         read_only_fields = [
             "project",
@@ -139,8 +155,15 @@ class IssueSerializer(serializers.ModelSerializer):
             "author",
         ]
 
+    def record_update(self, instance: Issue, previous: Dict[str, Any]) -> None:
+        """
+        Appends the changes to the issue history.
+        """
+        request = self.context.get("request")
+        record_issue_update(instance, previous, request.user if request else None)
 
-class CommentSerializer(serializers.ModelSerializer):
+
+class CommentSerializer(VersionedModelSerializer):
     """
     Serializer for Comment model.
     """
@@ -149,5 +172,104 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        fields = ["uuid", "text", "issue", "author", "author_username"]
+        fields = ["uuid", "text", "issue", "author", "author_username", "version"]
         read_only_fields = ["issue", "author"]
+
+    def create(self, validated_data: Dict[str, Any]) -> Comment:
+        """
+        Saves the comment with the other comments of its issue, cf core.comments.
+        """
+        validated_data.pop("version", None)
+        return comment_batcher.submit(Comment(**validated_data))
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """
+    Serializer for Notification model.
+    """
+
+    issue = serializers.IntegerField(source="comment.issue_id", read_only=True)
+    text = serializers.CharField(source="comment.text", read_only=True)
+
+    class Meta:
+        model = Notification
+        fields = ["id", "comment", "issue", "text", "is_read", "created_time"]
+        read_only_fields = fields
+
+
+class IssueEventSerializer(serializers.ModelSerializer):
+    """
+    Serializer for IssueEvent model.
+    """
+
+    changes = serializers.SerializerMethodField()
+
+    class Meta:
+        model = IssueEvent
+        fields = ["id", "version", "author", "created_time", "changes"]
+        read_only_fields = fields
+
+    def get_changes(self, event: IssueEvent) -> List[Dict[str, Any]]:
+        return decode_changes(event.changes)
+
+
+class ArchivedIssueEventSerializer(IssueEventSerializer):
+    """
+    Serializer for ArchivedIssueEvent model.
+    """
+
+    class Meta(IssueEventSerializer.Meta):
+        model = ArchivedIssueEvent
+
+
+class UserIssueSummarySerializer(serializers.ModelSerializer):
+    """
+    Serializer for UserIssueSummary model.
+    """
+
+    class Meta:
+        model = UserIssueSummary
+        fields = ["todo", "in_progress", "done"]
+        read_only_fields = fields
+
+
+class ArchivedCommentSerializer(serializers.ModelSerializer):
+    """
+    Serializer for ArchivedComment model.
+    """
+
+    author_username = serializers.CharField(source="author.username", read_only=True)
+
+    class Meta:
+        model = ArchivedComment
+        fields = ["uuid", "text", "author", "author_username", "created_time"]
+        read_only_fields = fields
+
+
+class ArchivedIssueSerializer(serializers.ModelSerializer):
+    """
+    Serializer for ArchivedIssue model, with its comments.
+    """
+
+    author_username = serializers.CharField(source="author.username", read_only=True)
+    comments = ArchivedCommentSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ArchivedIssue
+        fields = [
+            "id",
+            "title",
+            "description",
+            "priority",
+            "tag",
+            "status",
+            "project",
+            "author_username",
+            "author",
+            "assignee",
+            "created_time",
+            "updated_time",
+            "archived_time",
+            "comments",
+        ]
+        read_only_fields = fields
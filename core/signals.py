@@ -0,0 +1,53 @@
+from typing import Any, Optional
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Issue, UserIssueSummary
+
+
+STATUS_COLUMNS = {
+    "TODO": "todo",
+    "IN PROGRESS": "in_progress",
+    "DONE": "done",
+}
+
+
+def update_summary(user_id: Optional[int], status: Optional[str], delta: int) -> None:
+    """
+    Adds delta to the user's count of assigned issues with this status.
+    """
+    if user_id is None or status not in STATUS_COLUMNS:
+        return
+    column = STATUS_COLUMNS[status]
+    updated = UserIssueSummary.objects.filter(user_id=user_id).update(
+        **{column: F(column) + delta}
+    )
+    if not updated:
+        UserIssueSummary.objects.get_or_create(user_id=user_id)
+        UserIssueSummary.objects.filter(user_id=user_id).update(
+            **{column: F(column) + delta}
+        )
+
+
+@receiver(post_save, sender=Issue)
+def issue_saved(sender: Any, instance: Issue, created: bool, **kwargs: Any) -> None:
+    """
+    Moves the issue between the assignee summaries on assignee or status change.
+    """
+    previous = getattr(instance, "_loaded_assignment", (None, None))
+    current = (instance.assignee_id, instance.status)
+    if previous == current:
+        return
+    update_summary(*previous, -1)
+    update_summary(*current, 1)
+    instance._loaded_assignment = current
+
+
+@receiver(post_delete, sender=Issue)
+def issue_deleted(sender: Any, instance: Issue, **kwargs: Any) -> None:
+    """
+    Removes the issue from its assignee summary.
+    """
+    update_summary(*getattr(instance, "_loaded_assignment", (None, None)), -1)
@@ -0,0 +1,100 @@
+import subprocess
+import sys
+from importlib import import_module
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import Any, List, Tuple
+
+from django.conf import settings
+
+
+BOOT_SCRIPT = """
+import os, sys, time
+start = time.perf_counter()
+os.environ["DJANGO_SETTINGS_MODULE"] = sys.argv[1]
+from SoftDesk.wsgi import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(time.perf_counter() - start)
+print(",".join(sorted(sys.modules)))
+"""
+
+
+@dataclass
+class StartupProfile:
+    """
+    Cold start of a worker: wall time, import times and loaded modules.
+
+    Attributes:
+        seconds (float)
+        imports (List[Tuple[str, int, int]]): (module, self us, cumulative us)
+        modules (List[str])
+    """
+
+    seconds: float
+    imports: List[Tuple[str, int, int]] = field(default_factory=list)
+    modules: List[str] = field(default_factory=list)
+
+
+def measure_startup(settings_module: str) -> StartupProfile:
+    """
+    Boots the WSGI application and its URLconf in a fresh interpreter,
+    as a new worker would, and returns its profile.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", BOOT_SCRIPT, settings_module],
+        cwd=Path(settings.BASE_DIR),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        imports.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    seconds, modules = result.stdout.splitlines()[-2:]
+    return StartupProfile(float(seconds), imports, modules.split(","))
+
+
+ADMINDOCS_VIEWS = "django.contrib.admindocs.views"
+
+
+def _simplify_regex(pattern: str) -> str:
+    from django.contrib.admindocs.utils import replace_named_groups, replace_unnamed_groups
+
+    pattern = replace_named_groups(pattern)
+    pattern = replace_unnamed_groups(pattern)
+    pattern = pattern.replace("^", "").replace("$", "").replace("?", "")
+    if not pattern.startswith("/"):
+        pattern = "/" + pattern
+    return pattern
+
+
+def _load_admindocs_views(name: str) -> Any:
+    if name.startswith("__"):
+        # Looked up by the import system, e.g. __path__
+        raise AttributeError(name)
+    del sys.modules[ADMINDOCS_VIEWS]
+    return getattr(import_module(ADMINDOCS_VIEWS), name)
+
+
+def defer_admindocs_views() -> None:
+    """
+    rest_framework.views imports django.contrib.admindocs.views (through the
+    schema generator) for `simplify_regex` only, and that module imports the
+    whole admin. Registers a stand-in providing `simplify_regex`, which loads
+    the real module on access to anything else, so workers without the admin
+    do not import it.
+    """
+    if ADMINDOCS_VIEWS in sys.modules:
+        return
+    module = ModuleType(ADMINDOCS_VIEWS)
+    module.simplify_regex = _simplify_regex  # type: ignore[attr-defined]
+    module.__getattr__ = _load_admindocs_views  # type: ignore[attr-defined]
+    sys.modules[ADMINDOCS_VIEWS] = module
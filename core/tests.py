@@ -0,0 +1,855 @@
+import gzip
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from pathlib import Path
+from typing import Any, Dict
+from unittest import mock, skipIf
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import DatabaseError, IntegrityError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from . import metrics, startup, views
+from .admin import EstimatedCountPaginator
+from .archive import archive_done_issues
+from .comments import CommentBatcher, find_mentions, save_comments
+from .middleware import brotli
+from .models import (
+    CustomUser,
+    Contributor,
+    Project,
+    Issue,
+    Comment,
+    IssueEvent,
+    Notification,
+    UserIssueSummary,
+    ThrottleCounter,
+    ArchivedIssue,
+    ArchivedComment,
+    ArchivedIssueEvent,
+)
+from .renderers import msgpack
+from .startup import measure_startup
+from .throttling import CacheCounters, SlidingWindowThrottle
+
+
+class APITestCase(TestCase):
+    """
+    Base for API tests: a project with its author as contributor, an
+    authenticated client and empty throttle counters.
+    """
+
+    def setUp(self) -> None:
+        caches["throttle"].clear()
+        self.author = CustomUser.objects.create_user("author", password="password")
+        self.project = Project.objects.create(
+            title="project", description="d", type="BACKEND", author=self.author
+        )
+        Contributor.objects.create(user=self.author, project=self.project)
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def create_issue(self, **fields: Any) -> Issue:
+        values: Dict[str, Any] = {
+            "title": "issue",
+            "description": "d",
+            "priority": "LOW",
+            "tag": "BUG",
+            "project": self.project,
+            "author": self.author,
+        }
+        values.update(fields)
+        return Issue.objects.create(**values)
+
+    def issue_url(self, issue: Issue, suffix: str = "") -> str:
+        return f"/api/projects/{self.project.pk}/issues/{issue.pk}/{suffix}"
+
+    def age(self, *issues: Issue, days: int = 100) -> None:
+        Issue.objects.filter(pk__in=[issue.pk for issue in issues]).update(
+            updated_time=issues[0].updated_time - timedelta(days=days)
+        )
+
+
+class StartupBudgetTests(SimpleTestCase):
+    """
+    Cold start of the API-only deployment profile.
+    """
+
+    profile = "SoftDesk.settings_api"
+
+    def test_cold_start_within_budget(self) -> None:
+        budget = import_module(self.profile).STARTUP_BUDGET_SECONDS
+        # Best of 3 runs, to leave out the noise of other processes
+        seconds = min(measure_startup(self.profile).seconds for _ in range(3))
+        self.assertLess(seconds, budget)
+
+    def test_lighter_than_default_profile(self) -> None:
+        modules = set(measure_startup(self.profile).modules)
+        default_modules = set(measure_startup("SoftDesk.settings").modules)
+        self.assertEqual(modules - default_modules, {self.profile, "core.startup"})
+        self.assertGreaterEqual(len(default_modules - modules), 40)
+
+    def test_simplify_regex_stand_in(self) -> None:
+        from django.contrib.admindocs.views import simplify_regex
+
+        pattern = r"^projects/(?P<project_pk>[^/.]+)/issues/(?P<pk>[^/.]+)/$"
+        self.assertEqual(startup._simplify_regex(pattern), simplify_regex(pattern))
+
+    def test_admin_and_sessions_not_loaded(self) -> None:
+        modules = measure_startup(self.profile).modules
+        for module in (
+            "core.admin",
+            "django.contrib.admin",
+            "django.contrib.admindocs",
+            "django.contrib.sessions.models",
+            "django.contrib.sessions.middleware",
+            "django.contrib.messages.middleware",
+        ):
+            self.assertNotIn(module, modules)
+
+
+class AdminChangelistQueryCountTests(TestCase):
+    """
+    Changelists of large tables must not scale their queries with the
+    number of rows, projects, users or issues.
+    """
+
+    def setUp(self) -> None:
+        self.admin = CustomUser.objects.create_superuser("admin", "admin@softdesk.fr", "admin")
+        self.client.force_login(self.admin)
+
+    def create_rows(self, count: int) -> None:
+        for i in range(count):
+            user = CustomUser.objects.create(username=f"user-{count}-{i}")
+            project = Project.objects.create(
+                title=f"project {i}", description="d", type="BACKEND", author=user
+            )
+            issue = Issue.objects.create(
+                title=f"issue {i}",
+                description="d",
+                priority="LOW",
+                tag="BUG",
+                project=project,
+                author=user,
+            )
+            Comment.objects.create(text=f"comment {i}", issue=issue, author=user)
+
+    def count_queries(self, url: str) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        for query in queries.captured_queries:
+            # Filters must not list every project, user or issue
+            sql = query["sql"]
+            if " WHERE " not in sql:
+                self.assertNotRegex(sql, r'SELECT "core_(project|customuser)"\.')
+                self.assertNotRegex(sql, r'^SELECT "core_issue"\..* FROM "core_issue"( ORDER BY [^)]*)?$')
+        return len(queries)
+
+    def assert_constant_queries(self, url: str) -> None:
+        self.create_rows(5)
+        few = self.count_queries(url)
+        self.create_rows(30)
+        many = self.count_queries(url)
+        self.assertEqual(few, many)
+
+    def test_issue_changelist(self) -> None:
+        self.assert_constant_queries(reverse("admin:core_issue_changelist"))
+
+    def test_filtered_issue_changelist(self) -> None:
+        self.create_rows(1)
+        project = Project.objects.get()
+        self.assert_constant_queries(
+            reverse("admin:core_issue_changelist") + f"?project__id__exact={project.pk}"
+        )
+
+    def test_comment_changelist(self) -> None:
+        self.assert_constant_queries(reverse("admin:core_comment_changelist"))
+
+    def test_unfiltered_count_is_estimated(self) -> None:
+        self.create_rows(5)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        paginator = EstimatedCountPaginator(Issue.objects.order_by("-id"), 100)
+        with mock.patch("core.admin.ESTIMATED_COUNT_THRESHOLD", 0):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(paginator.count, 5)
+        self.assertNotIn("COUNT(", queries[0]["sql"])
+
+
+class IssueHistoryTests(APITestCase):
+    """
+    Append-only history of the issue changes.
+    """
+
+    def test_changes_are_recorded(self) -> None:
+        issue = self.create_issue()
+        self.client.patch(self.issue_url(issue), {"status": "IN PROGRESS"}, format="json")
+        self.client.patch(self.issue_url(issue), {"title": "renamed"}, format="json")
+        self.client.patch(self.issue_url(issue), {"priority": "HIGH"}, format="json")
+
+        response = self.client.get(self.issue_url(issue, "history/"))
+        self.assertEqual(
+            [event["changes"] for event in response.json()["results"]],
+            [
+                [{"field": "priority", "old": "LOW", "new": "HIGH"}],
+                [{"field": "status", "old": "TODO", "new": "IN PROGRESS"}],
+            ],
+        )
+
+    def test_archiving_keeps_the_history(self) -> None:
+        issue = self.create_issue()
+        for status in ("IN PROGRESS", "TODO", "IN PROGRESS", "DONE"):
+            self.client.patch(self.issue_url(issue), {"status": status}, format="json")
+        self.assertEqual(IssueEvent.objects.filter(issue=issue).count(), 4)
+        self.age(issue)
+
+        archive_done_issues(timedelta(days=90))
+
+        self.assertFalse(IssueEvent.objects.exists())
+        self.assertEqual(ArchivedIssueEvent.objects.filter(issue_id=issue.pk).count(), 4)
+        response = self.client.get(
+            f"/api/projects/{self.project.pk}/archived-issues/{issue.pk}/history/"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [event["changes"][0]["new"] for event in response.json()["results"]],
+            ["DONE", "IN PROGRESS", "TODO", "IN PROGRESS"],
+        )
+
+
+class MetricsTests(APITestCase):
+    """
+    Health checks and metrics export.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.metrics_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.metrics_dir.cleanup)
+
+    def test_exited_threads_are_folded(self) -> None:
+        shards = len(metrics._shards)
+
+        def record() -> None:
+            metrics.increment("test_thread_requests_total")
+            metrics.observe("test_thread_seconds", 0.1)
+
+        for _ in range(20):
+            thread = threading.Thread(target=record)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(len(metrics._shards), shards)
+        merged = metrics.snapshot()
+        self.assertEqual(merged["counter"][("test_thread_requests_total", ())], 20)
+        self.assertEqual(sum(merged["histogram"][("test_thread_seconds", ())][0]), 20)
+
+    def test_concurrent_flushes(self) -> None:
+        errors = []
+
+        def flush() -> None:
+            for _ in range(50):
+                try:
+                    metrics.flush(force=True)
+                except Exception as error:
+                    errors.append(error)
+
+        with override_settings(METRICS_DIR=self.metrics_dir.name):
+            threads = [threading.Thread(target=flush) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            [path.name for path in Path(self.metrics_dir.name).iterdir()],
+            [f"{os.getpid()}.json"],
+        )
+
+    def test_stray_files_are_ignored(self) -> None:
+        Path(self.metrics_dir.name, "notes.json").write_text("{}")
+        with override_settings(METRICS_DIR=self.metrics_dir.name):
+            self.client.get("/healthz")
+            response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'http_requests_total{action="get",method="GET",status="200",view="healthz"}',
+            response.content.decode(),
+        )
+
+    def test_export_errors_do_not_fail_requests(self) -> None:
+        with mock.patch("core.metrics.flush", side_effect=OSError("disk full")):
+            with self.assertLogs("core.middleware", "ERROR"):
+                response = self.client.get("/healthz")
+        self.assertEqual(response.status_code, 200)
+
+    def test_readyz_checks_migrations_once(self) -> None:
+        views._migrations_applied = False
+        self.addCleanup(setattr, views, "_migrations_applied", False)
+        with mock.patch("core.views.MigrationExecutor", wraps=views.MigrationExecutor) as executor:
+            self.assertEqual(self.client.get("/readyz").status_code, 200)
+            self.assertEqual(self.client.get("/readyz").status_code, 200)
+        self.assertEqual(executor.call_count, 1)
+
+
+class CommentBatcherTests(TransactionTestCase):
+    """
+    Coalescing of the comments created concurrently on an issue.
+    """
+
+    def setUp(self) -> None:
+        self.author = CustomUser.objects.create_user("author", password="password")
+        project = Project.objects.create(
+            title="project", description="d", type="BACKEND", author=self.author
+        )
+        self.issue = Issue.objects.create(
+            title="issue", description="d", priority="LOW", tag="BUG", project=project, author=self.author
+        )
+
+    def submit_concurrently(self, batcher: CommentBatcher, count: int) -> list:
+        results = []
+
+        def submit(i: int) -> None:
+            try:
+                results.append(batcher.submit(Comment(text=f"comment {i}", issue=self.issue, author=self.author)))
+            except Exception as error:
+                results.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_without_window_saves_right_away(self) -> None:
+        with mock.patch("core.comments.save_comments", wraps=save_comments) as save:
+            CommentBatcher(0).submit(Comment(text="comment", issue=self.issue, author=self.author))
+        self.assertEqual(save.call_count, 1)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_concurrent_comments_are_saved_together(self) -> None:
+        with mock.patch("core.comments.save_comments", wraps=save_comments) as save:
+            results = self.submit_concurrently(CommentBatcher(0.3), 8)
+
+        self.assertEqual(save.call_count, 1)
+        self.assertEqual(len(save.call_args[0][0]), 8)
+        self.assertTrue(all(isinstance(result, Comment) for result in results))
+        self.assertEqual(Comment.objects.count(), 8)
+
+    def test_errors_reach_every_request_of_the_batch(self) -> None:
+        with mock.patch("core.comments.save_comments", side_effect=IntegrityError("boom")):
+            results = self.submit_concurrently(CommentBatcher(0.3), 4)
+
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(isinstance(result, IntegrityError) for result in results))
+        self.assertFalse(Comment.objects.exists())
+
+
+class CommentEndpointTests(APITestCase):
+    """
+    Issue lookups of the comment endpoint.
+    """
+
+    def test_missing_issue_answers_404(self) -> None:
+        issue = self.create_issue()
+        other_project = Project.objects.create(
+            title="other", description="d", type="BACKEND", author=self.author
+        )
+        self.assertEqual(
+            self.client.get(f"/api/projects/{self.project.pk}/issues/9999/comments/").status_code, 404
+        )
+        self.assertEqual(
+            self.client.get(f"/api/projects/{other_project.pk}/issues/{issue.pk}/comments/").status_code,
+            404,
+        )
+
+    def test_missing_comment_answers_404(self) -> None:
+        issue = self.create_issue()
+        url = self.issue_url(issue, f"comments/{Comment(issue=issue).uuid}/")
+        self.assertEqual(self.client.patch(url, {"text": "t"}, format="json").status_code, 404)
+
+    def test_issue_is_loaded_once(self) -> None:
+        issue = self.create_issue()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.issue_url(issue, "comments/"), {"text": "t"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        issue_queries = [
+            query["sql"] for query in context.captured_queries
+            if query["sql"].startswith('SELECT "core_issue"')
+        ]
+        self.assertEqual(len(issue_queries), 1)
+
+
+class MentionTests(APITestCase):
+    """
+    Notifications of the contributors mentioned in comments.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.bob = CustomUser.objects.create_user("bob", password="password")
+        self.alice = CustomUser.objects.create_user("alice", password="password")
+        CustomUser.objects.create_user("outsider", password="password")
+        Contributor.objects.create(user=self.bob, project=self.project)
+        Contributor.objects.create(user=self.alice, project=self.project)
+        self.issue = self.create_issue()
+
+    def comment(self, text: str) -> Comment:
+        return Comment(text=text, issue=self.issue, author=self.author)
+
+    def test_find_mentions(self) -> None:
+        self.assertEqual(
+            find_mentions("@bob, see with @al-ice. Mail me at me@softdesk.fr"),
+            {"bob", "al-ice"},
+        )
+
+    def test_mentioned_contributors_are_notified(self) -> None:
+        response = self.client.post(
+            self.issue_url(self.issue, "comments/"), {"text": "@bob can you check?"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.user, self.bob)
+        self.assertEqual(str(notification.comment_id), response.json()["uuid"])
+
+        self.client.force_authenticate(self.bob)
+        response = self.client.get("/api/users/me/notifications/?is_read=false")
+        self.assertEqual(response.json()["count"], 1)
+
+    def test_self_mentions_and_non_contributors_are_not_notified(self) -> None:
+        save_comments([self.comment("@author @outsider @nobody")])
+        self.assertFalse(Notification.objects.exists())
+
+    def test_batch_fan_out(self) -> None:
+        comments = [self.comment("@bob"), self.comment("@bob @alice"), self.comment("nothing")]
+        with CaptureQueriesContext(connection) as context:
+            save_comments(comments)
+        queries = [query["sql"] for query in context.captured_queries if "SAVEPOINT" not in query["sql"]]
+        # Insert comments, one contributor lookup, insert notifications
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(
+            sorted(Notification.objects.values_list("user__username", flat=True)),
+            ["alice", "bob", "bob"],
+        )
+
+
+class ThrottlingTests(APITestCase):
+    """
+    Rate limiting and load shedding.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.issue = self.create_issue()
+
+    def rates(self, **rates: str) -> Dict[str, Any]:
+        rest_framework = dict(settings.REST_FRAMEWORK)
+        rest_framework["DEFAULT_THROTTLE_RATES"] = {
+            **rest_framework["DEFAULT_THROTTLE_RATES"], **rates
+        }
+        return {"REST_FRAMEWORK": rest_framework}
+
+    def assert_full_window_answers_429(self) -> None:
+        url = self.issue_url(self.issue, "comments/")
+        other_project = Project.objects.create(
+            title="other", description="d", type="BACKEND", author=self.author
+        )
+        Contributor.objects.create(user=self.author, project=other_project)
+        other_issue = self.create_issue(project=other_project)
+        other_url = f"/api/projects/{other_project.pk}/issues/{other_issue.pk}/comments/"
+
+        with override_settings(**self.rates(comments="3/min")):
+            statuses = [self.client.get(url).status_code for _ in range(4)]
+            response = self.client.get(url)
+
+            self.assertEqual(statuses, [200, 200, 200, 429])
+            self.assertEqual(response.status_code, 429)
+            self.assertTrue(0 < int(response["Retry-After"]) <= 120)
+            # Counters are per project
+            self.assertEqual(self.client.get(other_url).status_code, 200)
+
+    def test_full_window_answers_429(self) -> None:
+        self.assert_full_window_answers_429()
+
+    @override_settings(THROTTLE_COUNTERS="core.throttling.DatabaseCounters")
+    def test_database_counters(self) -> None:
+        self.assert_full_window_answers_429()
+        self.assertEqual(
+            sorted(ThrottleCounter.objects.values_list("count", flat=True)), [1, 3]
+        )
+
+    def test_retry_after_leaves_room(self) -> None:
+        request = mock.Mock(user=self.author)
+        view = mock.Mock(throttle_scope="comments", kwargs={"project_pk": self.project.pk})
+        start = 1000 * 60
+
+        throttle = SlidingWindowThrottle()
+
+        def allow(at: float) -> bool:
+            with mock.patch("core.throttling.time.time", return_value=at):
+                return throttle.allow_request(request, view)
+
+        with override_settings(**self.rates(comments="3/min")):
+            self.assertEqual([allow(start + 30) for _ in range(4)], [True, True, True, False])
+            # The next window still weighs the 3 requests of this one
+            retry = start + 30 + throttle.wait()
+            self.assertGreater(retry, start + 60)
+            self.assertFalse(allow(retry - 1))
+            self.assertTrue(allow(retry))
+
+    def test_counter_culled_before_decr(self) -> None:
+        counters = CacheCounters()
+        with mock.patch.object(counters.cache, "decr", side_effect=ValueError):
+            self.assertTrue(counters.take("key", 1, 60))
+            self.assertFalse(counters.take("key", 1, 60))
+
+    def test_concurrent_requests_are_all_counted(self) -> None:
+        request = mock.Mock(user=self.author)
+        view = mock.Mock(throttle_scope="comments", kwargs={"project_pk": self.project.pk})
+        allowed = []
+        barrier = threading.Barrier(10)
+
+        def check() -> None:
+            barrier.wait()
+            allowed.append(SlidingWindowThrottle().allow_request(request, view))
+
+        with override_settings(**self.rates(comments="5/min")):
+            threads = [threading.Thread(target=check) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(allowed.count(True), 5)
+
+    def test_throttles_are_checked_before_permissions(self) -> None:
+        outsider = CustomUser.objects.create_user("outsider", password="password")
+        self.client.force_authenticate(outsider)
+        url = self.issue_url(self.issue, "comments/")
+        with override_settings(**self.rates(comments="1/min")):
+            self.assertEqual(self.client.get(url).status_code, 403)
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(len(context.captured_queries), 0)
+
+    @override_settings(MAX_CONCURRENT_REQUESTS=0, CONCURRENCY_RETRY_AFTER=2)
+    def test_busy_worker_answers_503(self) -> None:
+        # A new client loads the middleware with no free slot
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.get(f"/api/projects/{self.project.pk}/")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "2")
+        # The probes still reach the worker
+        self.assertEqual(client.get("/healthz").status_code, 200)
+        self.assertEqual(client.get("/readyz").status_code, 200)
+
+
+class OptimisticConcurrencyTests(APITestCase):
+    """
+    Versioned updates of issues and comments.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.issue = self.create_issue(description="x" * 1000)
+
+    def patch(self, url: str, data: Dict[str, Any], **headers: str) -> Any:
+        return self.client.patch(url, data, format="json", **headers)
+
+    def test_stale_if_match_fails_the_precondition(self) -> None:
+        self.assertEqual(self.patch(self.issue_url(self.issue), {"title": "a"}).status_code, 200)
+
+        response = self.patch(self.issue_url(self.issue), {"title": "b"}, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 412)
+        self.issue.refresh_from_db()
+        self.assertEqual((self.issue.title, self.issue.version), ("a", 2))
+
+    def test_stale_body_version_conflicts(self) -> None:
+        self.assertEqual(self.patch(self.issue_url(self.issue), {"version": 1, "title": "a"}).status_code, 200)
+
+        response = self.patch(self.issue_url(self.issue), {"version": 1, "title": "b"})
+        self.assertEqual(response.status_code, 409)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.title, "a")
+
+    def test_update_without_version_loses_to_concurrent_write(self) -> None:
+        loaded = Issue.objects.get(pk=self.issue.pk)
+        # Another request writes between the load and the update
+        Issue.objects.filter(pk=self.issue.pk).update(title="concurrent", version=2)
+
+        with mock.patch.object(views.IssueViewSet, "get_object", return_value=loaded):
+            response = self.patch(self.issue_url(self.issue), {"title": "lost"})
+        self.assertEqual(response.status_code, 409)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.title, "concurrent")
+
+    def test_save_bumps_the_version(self) -> None:
+        # e.g. an edit in the admin
+        issue = Issue.objects.get(pk=self.issue.pk)
+        issue.title = "admin"
+        issue.save()
+        self.assertEqual(issue.version, 2)
+        issue.save(update_fields=["status"])
+        self.assertEqual(issue.version, 3)
+
+        response = self.patch(self.issue_url(self.issue), {"title": "api"}, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 412)
+        comment = Comment.objects.create(text="text", issue=self.issue, author=self.author)
+        self.assertEqual(comment.version, 1)
+        comment.save()
+        self.assertEqual(comment.version, 2)
+
+    def test_etag_round_trip_through_compression(self) -> None:
+        response = self.client.get(self.issue_url(self.issue), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["ETag"], 'W/"1"')
+
+        response = self.patch(self.issue_url(self.issue), {"title": "a"}, HTTP_IF_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], '"2"')
+
+        response = self.client.get(self.issue_url(self.issue))
+        self.assertEqual(response["ETag"], '"2"')
+
+    def test_comments_are_versioned(self) -> None:
+        comment = Comment.objects.create(text="text", issue=self.issue, author=self.author)
+        url = self.issue_url(self.issue, f"comments/{comment.pk}/")
+        self.assertEqual(self.client.get(url)["ETag"], '"1"')
+
+        response = self.patch(url, {"text": "edited"}, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["version"], 2)
+
+        self.assertEqual(self.patch(url, {"text": "stale"}, HTTP_IF_MATCH='"1"').status_code, 412)
+        self.assertEqual(self.patch(url, {"version": 1, "text": "stale"}).status_code, 409)
+        comment.refresh_from_db()
+        self.assertEqual((comment.text, comment.version), ("edited", 2))
+
+
+class ArchiveTests(APITestCase):
+    """
+    Archiving of old DONE issues and the archived issues endpoint.
+    """
+
+    def archived_url(self, issue_id: int) -> str:
+        return f"/api/projects/{self.project.pk}/archived-issues/{issue_id}/"
+
+    def test_only_old_done_issues_are_archived(self) -> None:
+        old_done = self.create_issue(status="DONE")
+        recent_done = self.create_issue(status="DONE")
+        old_open = self.create_issue(status="IN PROGRESS")
+        self.age(old_done, old_open)
+        self.age(recent_done, days=89)
+
+        self.assertEqual(archive_done_issues(timedelta(days=90)), 1)
+
+        self.assertEqual(list(ArchivedIssue.objects.values_list("id", flat=True)), [old_done.pk])
+        self.assertEqual(
+            set(Issue.objects.values_list("id", flat=True)), {recent_done.pk, old_open.pk}
+        )
+
+    def test_comments_move_with_their_issue(self) -> None:
+        issue = self.create_issue(status="DONE")
+        other = self.create_issue()
+        comment = Comment.objects.create(text="archived", issue=issue, author=self.author)
+        kept = Comment.objects.create(text="kept", issue=other, author=self.author)
+        self.age(issue)
+
+        archive_done_issues(timedelta(days=90))
+
+        self.assertEqual(list(Comment.objects.all()), [kept])
+        archived = ArchivedComment.objects.get()
+        self.assertEqual((archived.uuid, archived.issue_id, archived.text), (comment.uuid, issue.pk, "archived"))
+
+        response = self.client.get(self.archived_url(issue.pk))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c["text"] for c in response.json()["comments"]], ["archived"])
+
+    def test_notifications_of_archived_comments_are_deleted(self) -> None:
+        bob = CustomUser.objects.create_user("bob", password="password")
+        Contributor.objects.create(user=bob, project=self.project)
+        issue = self.create_issue(status="DONE")
+        other = self.create_issue()
+        save_comments([
+            Comment(text="@bob", issue=issue, author=self.author),
+            Comment(text="@bob", issue=other, author=self.author),
+        ])
+        self.age(issue)
+
+        archive_done_issues(timedelta(days=90))
+
+        self.assertEqual(list(Notification.objects.values_list("comment__issue", flat=True)), [other.pk])
+
+    def test_batches_commit_separately(self) -> None:
+        first = self.create_issue(status="DONE")
+        second = self.create_issue(status="DONE")
+        self.age(first, second)
+
+        with mock.patch.object(
+            ArchivedIssueEvent.objects, "bulk_create", side_effect=[[], DatabaseError("boom")]
+        ):
+            with self.assertRaises(DatabaseError):
+                archive_done_issues(timedelta(days=90), batch_size=1)
+
+        # The first batch stays archived, the failed one is rolled back
+        self.assertEqual(list(ArchivedIssue.objects.values_list("id", flat=True)), [first.pk])
+        self.assertEqual(list(Issue.objects.values_list("id", flat=True)), [second.pk])
+
+    def test_archived_issues_leave_the_issue_endpoint(self) -> None:
+        issue = self.create_issue(status="DONE")
+        self.age(issue)
+        archive_done_issues(timedelta(days=90))
+
+        response = self.client.get(f"/api/projects/{self.project.pk}/issues/")
+        self.assertEqual(response.json()["count"], 0)
+        self.assertEqual(self.client.get(self.issue_url(issue)).status_code, 404)
+        response = self.client.get(f"/api/projects/{self.project.pk}/archived-issues/")
+        self.assertEqual([i["id"] for i in response.json()["results"]], [issue.pk])
+
+    def test_archive_endpoint_is_read_only_for_contributors(self) -> None:
+        issue = self.create_issue(status="DONE")
+        self.age(issue)
+        archive_done_issues(timedelta(days=90))
+        url = self.archived_url(issue.pk)
+
+        self.assertEqual(self.client.put(url, {"title": "t"}, format="json").status_code, 405)
+        self.assertEqual(self.client.delete(url).status_code, 405)
+        self.assertEqual(
+            self.client.post(f"/api/projects/{self.project.pk}/archived-issues/", {}).status_code, 405
+        )
+
+        outsider = CustomUser.objects.create_user("outsider", password="password")
+        self.client.force_authenticate(outsider)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url + "history/").status_code, 403)
+
+
+class IssueSummaryTests(APITestCase):
+    """
+    The summaries kept by core.signals match a full rebuild.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.bob = CustomUser.objects.create_user("bob", password="password")
+        self.alice = CustomUser.objects.create_user("alice", password="password")
+        Contributor.objects.create(user=self.bob, project=self.project)
+        Contributor.objects.create(user=self.alice, project=self.project)
+
+    @staticmethod
+    def summaries() -> Dict[int, tuple]:
+        rows = UserIssueSummary.objects.values_list("user_id", "todo", "in_progress", "done")
+        return {user_id: tuple(counts) for user_id, *counts in rows if any(counts)}
+
+    def assert_matches_rebuild(self, expected: Dict[int, tuple]) -> None:
+        self.assertEqual(self.summaries(), expected)
+        call_command("rebuild_issue_summaries", stdout=StringIO())
+        self.assertEqual(self.summaries(), expected)
+
+    def test_summaries_follow_the_issues(self) -> None:
+        response = self.client.post(
+            f"/api/projects/{self.project.pk}/issues/",
+            {"title": "t", "description": "d", "priority": "LOW", "tag": "BUG", "assignee": self.bob.pk},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        url = f"/api/projects/{self.project.pk}/issues/{response.json()['id']}/"
+        other = self.create_issue(assignee=self.bob)
+        self.assert_matches_rebuild({self.bob.pk: (2, 0, 0)})
+
+        self.client.patch(url, {"assignee": self.alice.pk}, format="json")
+        self.assert_matches_rebuild({self.bob.pk: (1, 0, 0), self.alice.pk: (1, 0, 0)})
+
+        self.client.patch(url, {"status": "IN PROGRESS"}, format="json")
+        self.assert_matches_rebuild({self.bob.pk: (1, 0, 0), self.alice.pk: (0, 1, 0)})
+
+        self.client.patch(url, {"status": "DONE", "assignee": self.bob.pk}, format="json")
+        self.assert_matches_rebuild({self.bob.pk: (1, 0, 1)})
+
+        self.assertEqual(self.client.delete(self.issue_url(other)).status_code, 204)
+        self.assert_matches_rebuild({self.bob.pk: (0, 0, 1)})
+
+        Issue.objects.filter(pk=response.json()["id"]).update(
+            updated_time=other.updated_time - timedelta(days=100)
+        )
+        self.assertEqual(archive_done_issues(timedelta(days=90)), 1)
+        self.assert_matches_rebuild({})
+
+
+class CompactResponseTests(APITestCase):
+    """
+    Response compression and MessagePack.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.issue = self.create_issue(description="The login form crashes. " * 50)
+
+    def get(self, accept_encoding: str) -> Any:
+        return self.client.get(self.issue_url(self.issue), HTTP_ACCEPT_ENCODING=accept_encoding)
+
+    def test_small_responses_are_not_compressed(self) -> None:
+        with override_settings(COMPRESSION_MIN_SIZE=100_000):
+            response = self.get("gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertNotIn("Accept-Encoding", response.get("Vary", ""))
+
+    def test_gzip(self) -> None:
+        response = self.get("gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content), self.get("").content)
+
+    def test_uncompressed_responses_vary_on_accept_encoding(self) -> None:
+        response = self.get("identity")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_q0_excludes_an_encoding(self) -> None:
+        self.assertFalse(self.get("gzip;q=0").has_header("Content-Encoding"))
+        self.assertFalse(self.get("*;q=0").has_header("Content-Encoding"))
+
+    @skipIf(brotli is None, "brotli is not installed")
+    def test_brotli_or_gzip_by_q_value(self) -> None:
+        self.assertEqual(self.get("gzip, br")["Content-Encoding"], "br")
+        self.assertEqual(self.get("gzip;q=1, br;q=0.5")["Content-Encoding"], "gzip")
+        self.assertEqual(self.get("br;q=0, *")["Content-Encoding"], "gzip")
+
+        response = self.get("br")
+        self.assertEqual(brotli.decompress(response.content), self.get("").content)
+
+    @skipIf(msgpack is None, "msgpack is not installed")
+    def test_msgpack_responses(self) -> None:
+        response = self.client.get(self.issue_url(self.issue), HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content), self.client.get(self.issue_url(self.issue)).json())
+
+    @skipIf(msgpack is None, "msgpack is not installed")
+    def test_msgpack_requests(self) -> None:
+        url = f"/api/projects/{self.project.pk}/issues/"
+        body = msgpack.packb({"title": "packed", "description": "d", "priority": "LOW", "tag": "BUG"})
+        response = self.client.post(url, body, content_type="application/msgpack")
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Issue.objects.filter(title="packed").exists())
+
+        response = self.client.post(url, b"\xc1 not msgpack", content_type="application/msgpack")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("MessagePack parse error", response.json()["detail"])
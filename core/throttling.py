@@ -0,0 +1,201 @@
+import time
+from typing import Any, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.module_loading import import_string
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+from .models import ThrottleCounter
+
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """
+    Parses a rate such as "100/min" into (capacity, period in seconds).
+    """
+    num, period = rate.split("/")
+    return int(num), PERIODS[period[0]]
+
+
+class CacheCounters:
+    """
+    Request counters in the cache named by the THROTTLE_CACHE setting, only
+    changed with its atomic `add`, `incr` and `decr`. The in-memory default
+    is per process; a Memcached cache shares them between processes.
+    """
+
+    def __init__(self) -> None:
+        self.cache = caches[getattr(settings, "THROTTLE_CACHE", "default")]
+
+    def get(self, key: str) -> int:
+        """
+        Returns the count, 0 for a missing counter.
+        """
+        return self.cache.get(key, 0)
+
+    def take(self, key: str, limit: int, timeout: int) -> bool:
+        """
+        Increments the counter unless it would exceed limit.
+        """
+        self.cache.add(key, 0, timeout)
+        try:
+            count = self.cache.incr(key)
+        except ValueError:
+            # The counter expired or was culled between add and incr
+            self.cache.add(key, 0, timeout)
+            count = self.cache.incr(key)
+        if count <= limit:
+            return True
+        try:
+            self.cache.decr(key)
+        except ValueError:
+            # Expired meanwhile, nothing to give back
+            pass
+        return False
+
+
+class DatabaseCounters:
+    """
+    Request counters in the ThrottleCounter table, shared by every process
+    using the database. A conditional `UPDATE ... SET count = count + 1
+    WHERE count < limit` checks and increments a counter in one statement.
+    """
+
+    def get(self, key: str) -> int:
+        """
+        Returns the count, 0 for a missing counter.
+        """
+        return ThrottleCounter.objects.filter(key=key).values_list("count", flat=True).first() or 0
+
+    def take(self, key: str, limit: int, timeout: int) -> bool:
+        """
+        Increments the counter unless it would exceed limit.
+        """
+        if limit < 1:
+            return False
+        counters = ThrottleCounter.objects.filter(key=key, count__lt=limit)
+        if counters.update(count=F("count") + 1):
+            return True
+
+        now = time.time()
+        try:
+            with transaction.atomic():
+                ThrottleCounter.objects.create(key=key, count=1, expires=now + timeout)
+        except IntegrityError:
+            # The counter exists: full, or created by a concurrent request
+            return bool(counters.update(count=F("count") + 1))
+        # Once per client and window, drop the counters of past windows
+        ThrottleCounter.objects.filter(expires__lt=now).delete()
+        return True
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Sliding window throttle keyed by endpoint scope, user and project.
+
+    Requests are counted per fixed window of `period` seconds and the count of
+    the previous window is weighted by the part of it still covered by the
+    sliding window, which allows `capacity` requests per period without the
+    bursts of fixed windows at their boundaries. The counters are stored by
+    the THROTTLE_COUNTERS class, which checks and increments them atomically,
+    so concurrent requests never overwrite each other's count.
+    """
+
+    default_scope = "default"
+
+    def __init__(self) -> None:
+        self.counters = import_string(
+            getattr(settings, "THROTTLE_COUNTERS", "core.throttling.CacheCounters")
+        )()
+        self.wait_seconds: Optional[float] = None
+
+    def get_scope(self, view: Any) -> str:
+        """
+        Returns the endpoint class of the view.
+        """
+        return getattr(view, "throttle_scope", self.default_scope)
+
+    def get_rate(self, scope: str) -> Optional[str]:
+        """
+        Returns the configured rate for the scope.
+        """
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        if scope not in rates:
+            raise ImproperlyConfigured(f"No throttle rate set for scope '{scope}'.")
+        return rates[scope]
+
+    def get_cache_key(self, request: Request, view: Any, scope: str) -> str:
+        """
+        Returns the counter key for the user (or client address) and project.
+        """
+        if request.user and request.user.is_authenticated:
+            ident = f"user-{request.user.pk}"
+        else:
+            ident = f"anon-{self.get_ident(request)}"
+        project = view.kwargs.get("project_pk", "-")
+        return f"throttle:{scope}:{ident}:{project}"
+
+    def allow_request(self, request: Request, view: Any) -> bool:
+        """
+        Counts the request, or rejects it once the window is full.
+        """
+        scope = self.get_scope(view)
+        rate = self.get_rate(scope)
+        if rate is None:
+            return True
+
+        capacity, period = parse_rate(rate)
+        key = self.get_cache_key(request, view, scope)
+        window, offset = divmod(time.time(), period)
+        elapsed = offset / period
+
+        previous = self.counters.get(f"{key}:{int(window) - 1}")
+        limit = int(capacity - previous * (1 - elapsed))
+        if self.counters.take(f"{key}:{int(window)}", limit, 2 * period):
+            return True
+
+        current = self.counters.get(f"{key}:{int(window)}")
+        if previous and current < capacity:
+            # Wait until the weight of the previous window leaves room
+            self.wait_seconds = ((1 - (capacity - current - 1) / previous) - elapsed) * period
+        else:
+            # Wait for the next window, until the weight of this one leaves room
+            next_elapsed = max(0.0, 1 - (capacity - 1) / current) if current else 0.0
+            self.wait_seconds = (1 - elapsed + next_elapsed) * period
+        metrics.increment("throttled_requests_total", scope=scope)
+        return False
+
+    def wait(self) -> Optional[float]:
+        """
+        Returns the seconds until a request is allowed again.
+        """
+        return self.wait_seconds
+
+
+class ThrottleFirstMixin:
+    """
+    Checks the throttles before the permissions, so rejected requests do not
+    pay for the permission queries. Same steps as APIView.initial otherwise.
+    """
+
+    def initial(self, request: Request, *args: Any, **kwargs: Any) -> None:
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        self.perform_authentication(request)
+        self.check_throttles(request)
+        self.check_permissions(request)
@@ -1,8 +1,26 @@
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.db import DatabaseError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
-from .models import CustomUser, Project, Issue, Comment, Contributor
+from django.views.decorators.http import require_GET
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .models import (
+    CustomUser,
+    Project,
+    Issue,
+    Comment,
+    Contributor,
+    Notification,
+    IssueEvent,
+    UserIssueSummary,
+    ArchivedIssue,
+    ArchivedIssueEvent,
+)
 from .serializers import (
     CustomUserSerializer,
     CustomUserUpdateSerializer,
@@ -10,21 +28,103 @@ from .serializers import (
     ContributorSerializer,
     IssueSerializer,
     CommentSerializer,
+    NotificationSerializer,
+    IssueEventSerializer,
+    UserIssueSummarySerializer,
+    ArchivedIssueSerializer,
+    ArchivedIssueEventSerializer,
 )
+from . import metrics
+from .concurrency import ETagMixin
+from .throttling import ThrottleFirstMixin
 from .permissions import (
     UserPermission,
     ProjectPermission,
     ContributorPermission,
     IssuePermission,
     CommentPermission,
+    ArchivedIssuePermission,
 )
 
 
-class CustomUserViewSet(viewsets.ModelViewSet):
+@require_GET
+def healthz(request: HttpRequest) -> JsonResponse:
+    """
+    Liveness: the worker answers requests.
+    """
+    return JsonResponse({"status": "ok"})
+
+
+# Set once readyz found every migration applied: migrations are not
+# unapplied while the worker runs, so later probes only check the database.
+_migrations_applied = False
+
+
+@require_GET
+def readyz(request: HttpRequest) -> JsonResponse:
+    """
+    Readiness: the database answers and has no unapplied migration.
+    """
+    global _migrations_applied
+    pending = []
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        if not _migrations_applied:
+            executor = MigrationExecutor(connection)
+            pending = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    except DatabaseError as error:
+        return JsonResponse({"status": "unavailable", "database": str(error)}, status=503)
+
+    if pending:
+        return JsonResponse(
+            {"status": "unavailable", "pending_migrations": [str(migration) for migration, _ in pending]},
+            status=503,
+        )
+    _migrations_applied = True
+    return JsonResponse({"status": "ok"})
+
+
+@require_GET
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """
+    Metrics of the workers in the Prometheus text format.
+    """
+    return HttpResponse(
+        metrics.render_prometheus(metrics.collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+class IssueHistoryPagination(CursorPagination):
+    """
+    Pages the issue history from the newest event, by id.
+    """
+
+    ordering = "-id"
+    page_size = 20
+
+
+class ThrottledTokenObtainPairView(ThrottleFirstMixin, TokenObtainPairView):
+    """
+    API endpoint to obtain a JWT pair.
+    """
+    throttle_scope = "auth"
+
+
+class ThrottledTokenRefreshView(ThrottleFirstMixin, TokenRefreshView):
+    """
+    API endpoint to refresh a JWT.
+    """
+    throttle_scope = "auth"
+
+
+class CustomUserViewSet(ThrottleFirstMixin, viewsets.ModelViewSet):
     """
     API endpoint for CustomUser.
     """
     permission_classes = [UserPermission]
+    throttle_scope = "users"
 
     def get_queryset(self) -> CustomUser:
         """
@@ -38,14 +138,63 @@ class CustomUserViewSet(viewsets.ModelViewSet):
         """
         if self.action in ["update", "partial_update"]:
             return CustomUserUpdateSerializer
+        if self.action == "my_issues":
+            return IssueSerializer
+        if self.action == "my_notifications":
+            return NotificationSerializer
         return CustomUserSerializer
 
+    @action(detail=False, methods=["get"], url_path="me/issues")
+    def my_issues(self, request, *args, **kwargs) -> Response:
+        """
+        Lists the issues assigned to the user across all projects,
+        with the per-status summary. Filter with ?status=TODO.
+        """
+        issues = (
+            Issue.objects.filter(assignee=request.user)
+            .select_related("author")
+            .order_by("-updated_time", "-id")
+        )
+        if "status" in request.query_params:
+            issues = issues.filter(status=request.query_params["status"])
+
+        summary = UserIssueSummary.objects.filter(user=request.user).first()
+        summary_data = UserIssueSummarySerializer(
+            summary or UserIssueSummary(user=request.user)
+        ).data
+
+        page = self.paginate_queryset(issues)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response.data["summary"] = summary_data
+        return response
+
+    @action(detail=False, methods=["get"], url_path="me/notifications")
+    def my_notifications(self, request, *args, **kwargs) -> Response:
+        """
+        Lists the comments mentioning the user, newest first.
+        Filter the unread ones with ?is_read=false.
+        """
+        notifications = (
+            Notification.objects.filter(user=request.user)
+            .select_related("comment")
+            .order_by("-created_time", "-id")
+        )
+        if "is_read" in request.query_params:
+            notifications = notifications.filter(
+                is_read=request.query_params["is_read"].lower() == "true"
+            )
+        page = self.paginate_queryset(notifications)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(ThrottleFirstMixin, viewsets.ModelViewSet):
     """
     API endpoint for Project.
     """
     permission_classes = [IsAuthenticated, ProjectPermission]
+    throttle_scope = "projects"
     serializer_class = ProjectSerializer
 
     def get_queryset(self) -> Project:
@@ -63,12 +212,13 @@ class ProjectViewSet(viewsets.ModelViewSet):
             user=self.request.user, project=project)
 
 
-class ContributorViewSet(viewsets.ModelViewSet):
+class ContributorViewSet(ThrottleFirstMixin, viewsets.ModelViewSet):
     """
     API endpoint for Contributor.
     """
 
     permission_classes = [IsAuthenticated, ContributorPermission]
+    throttle_scope = "contributors"
     serializer_class = ContributorSerializer
 
     def get_queryset(self) -> Contributor:
@@ -134,12 +284,13 @@ class ContributorViewSet(viewsets.ModelViewSet):
         return Response('Contributor successfully deleted.', status=status.HTTP_204_NO_CONTENT)
 
 
-class IssueViewSet(viewsets.ModelViewSet):
+class IssueViewSet(ThrottleFirstMixin, ETagMixin, viewsets.ModelViewSet):
     """
     API endpoint for Issue.
     """
 
     permission_classes = [IsAuthenticated, IssuePermission]
+    throttle_scope = "issues"
     serializer_class = IssueSerializer
 
     def get_queryset(self) -> Issue:
@@ -154,13 +305,27 @@ class IssueViewSet(viewsets.ModelViewSet):
         """
         serializer.save(project_id=self.kwargs["project_pk"], author=self.request.user)
 
+    @action(detail=True, methods=["get"])
+    def history(self, request, *args, **kwargs) -> Response:
+        """
+        Lists the changes of status, priority, assignee and tag of the issue.
+        """
+        events = IssueEvent.objects.filter(
+            issue_id=self.kwargs["pk"], issue__project_id=self.kwargs["project_pk"]
+        )
+        paginator = IssueHistoryPagination()
+        page = paginator.paginate_queryset(events, request, view=self)
+        serializer = IssueEventSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
-class CommentViewSet(viewsets.ModelViewSet):
+
+class CommentViewSet(ThrottleFirstMixin, ETagMixin, viewsets.ModelViewSet):
     """
     API endpoint for Comment.
     """
 
     permission_classes = [IsAuthenticated, CommentPermission]
+    throttle_scope = "comments"
     serializer_class = CommentSerializer
 
     def get_queryset(self) -> Comment:
@@ -169,12 +334,55 @@ class CommentViewSet(viewsets.ModelViewSet):
         """
         return Comment.objects.filter(issue_id=self.kwargs["issue_pk"])
 
+    def get_issue(self) -> Issue:
+        """
+        Returns the issue of the URL, loaded once per request and shared with
+        CommentPermission.
+        """
+        if not hasattr(self, "_issue"):
+            self._issue = get_object_or_404(
+                Issue.objects.select_related("project"),
+                id=self.kwargs["issue_pk"],
+                project_id=self.kwargs["project_pk"],
+            )
+        return self._issue
+
     def perform_create(self, serializer: CommentSerializer) -> None:
         """
         Performs creation of a new comment.
         """
-        project_id = self.kwargs.get("project_pk")
-        issue_id = self.kwargs.get("issue_pk")
-        get_object_or_404(Project, id=project_id)
-        issue = get_object_or_404(Issue, id=issue_id)
-        serializer.save(issue=issue, author=self.request.user)
+        serializer.save(issue=self.get_issue(), author=self.request.user)
+
+
+class ArchivedIssueViewSet(ThrottleFirstMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Read-only API endpoint for archived Issues and their Comments.
+    """
+
+    permission_classes = [IsAuthenticated, ArchivedIssuePermission]
+    serializer_class = ArchivedIssueSerializer
+    throttle_scope = "issues"
+
+    def get_queryset(self) -> ArchivedIssue:
+        """
+        Returns queryset filtered by project.
+        """
+        return (
+            ArchivedIssue.objects.filter(project_id=self.kwargs["project_pk"])
+            .select_related("author")
+            .prefetch_related("comments__author")
+            .order_by("-archived_time", "-id")
+        )
+
+    @action(detail=True, methods=["get"])
+    def history(self, request, *args, **kwargs) -> Response:
+        """
+        Lists the changes of the archived issue, as IssueViewSet.history.
+        """
+        events = ArchivedIssueEvent.objects.filter(
+            issue_id=self.kwargs["pk"], issue__project_id=self.kwargs["project_pk"]
+        )
+        paginator = IssueHistoryPagination()
+        page = paginator.paginate_queryset(events, request, view=self)
+        serializer = ArchivedIssueEventSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)